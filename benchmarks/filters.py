@@ -0,0 +1,32 @@
+"""
+RunLengthDecode, ASCIIHexDecode and ASCII85Decode throughput.
+
+Usage::
+
+    python -m benchmarks.filters [size]
+
+"""
+import sys
+import time
+
+from pdfreader.filters.test_bulk_decoding import CASES, sample_data
+
+
+def run(size=2**20):
+    data = sample_data(size)
+    for name, module, encode in CASES:
+        bench(name, module, encode(data), data)
+
+
+def bench(name, module, encoded, expected):
+    start = time.perf_counter()
+    res = module.decode(encoded, {})
+    elapsed = time.perf_counter() - start
+    if res != expected:
+        raise AssertionError("{} decoded wrong data".format(name))
+    print("{:>16}: {} bytes in {:.3f}s, {:.2f} MB/s"
+          .format(name, len(encoded), elapsed, len(encoded) / elapsed / 2**20))
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,58 @@
+"""
+PNG and TIFF predictors decoding throughput, with NumPy (when installed) and pure Python.
+
+Usage::
+
+    python -m benchmarks.predictors [n_rows]
+
+"""
+import random
+import sys
+import time
+
+from pdfreader.filters import predictors
+
+
+COLUMNS, COLORS = 600, 3
+
+
+def png_data(ftype, n_rows):
+    rowlen = COLUMNS * COLORS
+    rnd = random.Random(ftype)
+    row = bytes([ftype]) + bytes(rnd.randrange(256) for _ in range(rowlen))
+    return row * n_rows
+
+
+def tiff_data(bpc, n_rows):
+    rowlen, _ = predictors.row_geometry(COLUMNS, COLORS, bpc)
+    rnd = random.Random(bpc)
+    return bytes(rnd.randrange(256) for _ in range(rowlen)) * n_rows
+
+
+def run(n_rows=200):
+    cases = [("PNG {}".format(name), png_data(ftype, n_rows), 12, 8)
+             for ftype, name in enumerate(("None", "Sub", "Up", "Average", "Paeth"))]
+    cases += [("TIFF {} bits".format(bpc), tiff_data(bpc, n_rows), 2, bpc) for bpc in (8, 16, 4)]
+
+    numpy = predictors.numpy
+    for name, data, predictor, bpc in cases:
+        for engine in ("numpy", "python"):
+            if engine == "numpy" and numpy is None:
+                continue
+            predictors.numpy = numpy if engine == "numpy" else None
+            try:
+                bench(name, engine, data, predictor, bpc)
+            finally:
+                predictors.numpy = numpy
+
+
+def bench(name, engine, data, predictor, bpc):
+    start = time.perf_counter()
+    predictors._remove_predictors(data, predictor, COLUMNS, COLORS, bpc)
+    elapsed = time.perf_counter() - start
+    print("{:>14} {:>6}: {} bytes in {:.3f}s, {:.2f} MB/s"
+          .format(name, engine, len(data), elapsed, len(data) / elapsed / 2**20))
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,67 @@
+"""
+Content stream tokenizer throughput with Decimal and float real numbers.
+
+Usage::
+
+    python -m benchmarks.tokenizer [n_repeats]
+
+"""
+import sys
+import time
+from decimal import Decimal
+
+from pdfreader.parsers.content import ContentParser
+
+
+CHUNK = b"""q
+0.12 0 0 0.12 0 0 cm
+BT
+/F1 9.5 Tf
+1 0 0 1 72.5 700.25 Tm
+[(Hello) -250.5 (W) 30 (orld)] TJ
+0 -11.4 Td
+(Text \\(with escapes\\) and parens) Tj
+/F2 12 Tf
+<48656C6C6F> Tj
+ET
+0.5 0.5 0.5 rg
+10.25 20.5 300 -15.75 re f
+% a comment
+/GS1 gs
+1 0 0 RG 0.75 w 100 200 m 300.5 400.25 l S
+Q
+"""
+
+#: vector graphics: mostly real operands
+GRAPHICS = b"""0.2 0.4 0.6 rg
+102.35 215.7 m 110.125 230.45 l 118.5 228.875 125.25 240.0 133.75 236.5 c
+140.05 250.3 l 150.125 260.65 160.875 255.2 170.4 262.35 c h f
+0.5 0 0 0.5 12.75 -8.25 cm 1.25 w [3.5 1.75] 0.5 d
+"""
+
+
+def tokens_count(objects):
+    n = 0
+    for obj in objects:
+        n += 1 + len(getattr(obj, 'args', ()))
+    return n
+
+
+def run(n_repeats=2000):
+    for name, chunk in (("text", CHUNK), ("graphics", GRAPHICS)):
+        print(name)
+        bench(chunk * n_repeats)
+
+
+def bench(data):
+    for real_type in (Decimal, float):
+        start = time.perf_counter()
+        n_tokens = tokens_count(ContentParser(data, real_type=real_type).objects())
+        elapsed = time.perf_counter() - start
+        print("{:>7}: {} bytes, {} tokens in {:.3f}s: {:,.0f} tokens/sec, {:.2f} MB/s"
+              .format(real_type.__name__, len(data), n_tokens, elapsed, n_tokens / elapsed,
+                      len(data) / elapsed / 2**20))
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:]])
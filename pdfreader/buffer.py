@@ -1,8 +1,15 @@
 import os
+import mmap
 from io import BytesIO
 
 from .exceptions import EOFException
 
+#: single-byte bytes objects by code
+BYTES = tuple(bytes((i,)) for i in range(256))
+
+#: guaranteed number of bytes available for regex lookahead
+LOOKAHEAD = 256
+
 
 class Buffer(object):
     """
@@ -77,60 +84,133 @@ class Buffer(object):
     >>> b.current
     b'3'
 
+    Test bulk reading across blocks
+
+    >>> s = BytesIO(b"0123456789")
+    >>> b = Buffer(s, 1, 3)
+    >>> b.read(7)
+    b'1234567'
+    >>> b.read_backward(5)
+    b'45678'
+    >>> b.current
+    b'3'
+    >>> b.read(100)
+    b'3456789'
+    >>> b.is_eof
+    True
+
+    >>> b = Buffer(s, 7, 3)
+    >>> b.read_backward(6)
+    b'234567'
+    >>> b.next()
+    b'1'
+
+    Test sliding window: data out of the window is dropped and read again when needed
+
+    >>> s = BytesIO(bytes(range(100)))
+    >>> b = Buffer(s, 0, 4, window_size=10)
+    >>> state = b.get_state()
+    >>> b''.join(b.read(5) for _ in range(10)) == bytes(range(50))
+    True
+    >>> len(b.data) <= 2 * b.window_size
+    True
+    >>> b.set_state(state)
+    >>> b.read(3) == bytes([0, 1, 2])
+    True
 
     """
 
-    state_attrs = ('offset', 'block_size', 'last_block_size', 'last_block_offset', 'index', 'data')
+    #: maximum size of loaded data kept around the pointer. None means unlimited.
+    #: Resident data never exceeds double window size except for single bigger reads.
+    window_size = None
 
-    def __init__(self, fileobj, offset, block_size=1024):
+    def __init__(self, fileobj, offset, block_size=1024, window_size=None):
         self.fileobj = BytesIO(fileobj) if isinstance(fileobj, bytes) else fileobj
         self.offset = offset
         self.block_size = block_size
-        self.last_block_size = None
-        self.last_block_offset = None
+        if window_size is not None:
+            self.window_size = max(window_size, block_size)
+        # data holds file bytes starting from data_offset; index points to the current byte within data
+        self.data_offset = 0
         self.index = None
         self.data = b''
         self.reset(offset)
         self.stack = []
 
-    def _read_forward(self):
-        offset = self.last_block_offset + self.block_size
-        self.fileobj.seek(offset)
-        data = self.fileobj.read(self.block_size)
-        if not (bool(data)):
+    @property
+    def position(self):
+        """ Absolute file offset of the current byte """
+        return self.data_offset + self.index
+
+    def _read_forward(self, size=None):
+        """ Appends at least one block of data """
+        self.fileobj.seek(self.data_offset + len(self.data))
+        data = self.fileobj.read(max(size or 0, self.block_size))
+        if not data:
             raise EOFException()
-        self.last_block_size = len(data)
-        self.last_block_offset += self.last_block_size
         self.data += data
 
-    def _read_backward(self):
-        if self.last_block_offset == 0:
+    def _read_backward(self, size=None):
+        """ Prepends at least one block of data """
+        if self.data_offset == 0:
             raise EOFException()
-        size = min(self.last_block_offset, self.block_size)
-        offset = self.last_block_offset - size
-        self.fileobj.seek(offset)
+        offset = max(self.data_offset - max(size or 0, self.block_size), 0)
         self.fileobj.seek(offset)
-        data = self.fileobj.read(size)
-        self.last_block_size = len(data)
-        self.last_block_offset = offset
-        self.index = self.last_block_size + self.index
+        data = self.fileobj.read(self.data_offset - offset)
+        self.index += len(data)
+        self.data_offset = offset
         self.data = data + self.data
 
     def _read_head(self, offset):
         self.fileobj.seek(offset)
-        data = self.fileobj.read(self.block_size)
-        self.last_block_offset = offset
-        self.last_block_size = len(data)
-        self.data = data
+        self.data = self.fileobj.read(self.block_size)
+        self.data_offset = offset
         self.index = 0
 
     def _read_tail(self, offset):
-        real_offset = self.fileobj.seek(offset, os.SEEK_END)
-        data = self.fileobj.read()
-        self.last_block_offset = real_offset
-        self.last_block_size = len(data)
-        self.data = data
-        self.index = len(data) - 1
+        file_size = self.fileobj.seek(0, os.SEEK_END)
+        self.data_offset = max(file_size + offset, 0)
+        self.fileobj.seek(self.data_offset)
+        self.data = self.fileobj.read()
+        self.index = len(self.data) - 1
+
+    def _load(self, start, end):
+        """ Makes data[start:end] available as far as the file allows. Indexes are relative to data. """
+        try:
+            if start < 0:
+                index = self.index
+                self._read_backward(-start)
+                # data has been prepended, so relative indexes moved along with the pointer
+                end += self.index - index
+            if end > len(self.data):
+                self._read_forward(end - len(self.data))
+        except EOFException:
+            pass
+        if self.window_size and len(self.data) > 2 * self.window_size:
+            self._trim(start, end)
+
+    def _trim(self, start, end):
+        """ Drops data out of the window, but keeps data[start:end] and the current byte """
+        excess = len(self.data) - self.window_size
+        head = min(excess, start, self.index)
+        if head > 0:
+            self.data = self.data[head:]
+            self.data_offset += head
+            self.index -= head
+            excess -= head
+            end -= head
+        tail = min(excess, len(self.data) - max(end, self.index + 1))
+        if tail > 0:
+            self.data = self.data[:-tail]
+
+    def _seek(self, position):
+        """ Moves pointer to an absolute file offset """
+        index = position - self.data_offset
+        if 0 <= index < len(self.data):
+            self.index = index
+        else:
+            self._read_head(max(position, 0))
+            self.index += position - self.data_offset
 
     def next(self):
         """ Returns current byte and moves pointer to the next byte """
@@ -146,15 +226,13 @@ class Buffer(object):
 
     @property
     def current(self):
-        try:
-            if self.index >= len(self.data):
-                self._read_forward()
-            elif self.index < 0:
-                self._read_backward()
-            res = bytes([self.data[self.index]])
-        except EOFException:
-            res = None
-        return res
+        i = self.index
+        if not 0 <= i < len(self.data):
+            self._load(i, i + 1)
+            i = self.index
+            if not 0 <= i < len(self.data):
+                return None
+        return BYTES[self.data[i]]
 
     def reset(self, offset):
         if offset >= 0:
@@ -163,24 +241,286 @@ class Buffer(object):
             self._read_tail(offset)
 
     def read(self, n):
-        return b''.join([self.next() for _ in range(n)])
+        """ Returns next n bytes (or less at EOF) and moves pointer forward by n """
+        return bytes(self.read_view(n))
+
+    def read_view(self, n):
+        """ Same as read(), but returns a memoryview slice over the buffer data """
+        self._load(self.index, self.index + n)
+        start = max(self.index, 0)
+        res = memoryview(self.data)[start:self.index + n]
+        self.index += n
+        return res
+
+    def read_at(self, offset, n):
+        """ Returns n bytes (or less at EOF) from the absolute offset. Neither moves the pointer nor loads data.
+
+        >>> b = Buffer(b"0123456789", 2)
+        >>> b.read_at(5, 3), b.read_at(8, 10), b.current
+        (b'567', b'89', b'2')
+        """
+        self.fileobj.seek(offset)
+        return self.fileobj.read(n)
 
     def read_backward(self, n):
-        res = b''
-        for _ in range(n): res = self.prev() + res
-        return res
+        """ Returns n bytes up to the current one inclusive (or less at the beginning of file)
+            and moves pointer backward by n
+        """
+        self._load(self.index - n + 1, self.index + 1)
+        start = max(self.index - n + 1, 0)
+        res = self.data[start:self.index + 1]
+        self.index -= n
+        return bytes(res)
+
+    def find(self, sub):
+        """ Searches bytes forward from the current one. Doesn't move the pointer.
+
+            :return: absolute file offset of the first occurrence or -1 if not found
+
+            >>> b = Buffer(b'0123456789', 0, 3)
+            >>> b.read(2)
+            b'01'
+            >>> b.find(b'789'), b.find(b'01'), b.find(b'9a')
+            (7, -1, -1)
+            >>> b.next()
+            b'2'
+        """
+        start = self.position
+        while True:
+            i = self.data.find(sub, max(start - self.data_offset, 0))
+            if i >= 0:
+                return self.data_offset + i
+            size = len(self.data)
+            data_end = self.data_offset + size
+            # continue with the possibly partial match at the end of data
+            start = max(start, data_end - len(sub) + 1)
+            self._load(self.index, 2 * size + self.block_size)
+            if self.data_offset + len(self.data) <= data_end:
+                # EOF
+                return -1
+
+    def rfind(self, sub, size=None):
+        """ Searches bytes backward: the occurrence shall end at the current byte or before.
+            Doesn't move the pointer.
+
+            :param size: search within `size` bytes up to the current one only. Unlimited by default.
+            :return: absolute file offset of the last occurrence or -1 if not found
+
+            >>> b = Buffer(b'0123456789', 0, 3)
+            >>> b.reset(-1)
+            >>> b.rfind(b'123'), b.rfind(b'89'), b.rfind(b'123', 8), b.rfind(b'9a')
+            (1, 8, -1, -1)
+            >>> b.current
+            b'9'
+        """
+        end = self.position + 1
+        start = 0 if size is None else max(end - size, 0)
+        while True:
+            i = self.data.rfind(sub, max(start - self.data_offset, 0), end - self.data_offset)
+            if i >= 0:
+                return self.data_offset + i
+            if self.data_offset <= start:
+                return -1
+            # load twice more data backward
+            data_start = max(start, self.data_offset - max(len(self.data), self.block_size))
+            self._load(data_start - self.data_offset, self.index + 1)
+
+    def finditer(self, regex, chunk_size=2**20):
+        """ Iterates over the regex matches through the whole file with bulk reads.
+            Doesn't move the pointer. Matches are supposed to be shorter than LOOKAHEAD bytes.
+
+            :return: generator of (absolute offset, match object) pairs
+
+            >>> import re
+            >>> b = Buffer(b'a1 b22 c333 d4444', 0, 3)
+            >>> [(offset, m.group()) for offset, m in b.finditer(re.compile(b'[0-9]+'), chunk_size=4)]
+            [(1, b'1'), (4, b'22'), (8, b'333'), (13, b'4444')]
+        """
+        data_offset, data, start = 0, b'', 0
+        while True:
+            self.fileobj.seek(data_offset + len(data))
+            chunk = self.fileobj.read(chunk_size)
+            data += chunk
+            # matches close to the end may continue in the next chunk
+            limit = len(data) - LOOKAHEAD if chunk else len(data)
+            resume = max(limit, start)
+            for m in regex.finditer(data, start):
+                if m.end() > limit:
+                    resume = m.start()
+                    break
+                yield data_offset + m.start(), m
+            if not chunk:
+                break
+            # keep some data before the resume point for lookbehind assertions
+            cut = max(resume - LOOKAHEAD, 0)
+            data_offset, data, start = data_offset + cut, data[cut:], resume - cut
+
+    def match(self, regex):
+        """ Matches compiled bytes regex at the current byte.
+            Moves pointer to the next byte after the match on success.
+
+            :return: match object or None
+        """
+        i, size = self.index, len(self.data)
+        if 0 <= i < size - LOOKAHEAD:
+            m = regex.match(self.data, i)
+            if m is not None:
+                end = m.end()
+                if end < size:
+                    self.index = end
+                    return m
+        elif not 0 <= i < size:
+            self._load(i, i + self.block_size)
+            i = self.index
+        m = regex.match(self.data, i)
+        # the match may continue (or become possible) beyond the loaded data
+        while (m is None and len(self.data) - i < LOOKAHEAD) or (m is not None and m.end() == len(self.data)):
+            size = len(self.data)
+            data_end = self.data_offset + size
+            self._load(i, 2 * size - i + self.block_size)
+            if self.data_offset + len(self.data) <= data_end:
+                # EOF
+                break
+            i = self.index
+            m = regex.match(self.data, i)
+        if m is not None:
+            self.index = m.end()
+        return m
 
     @property
     def is_eof(self):
         return self.current is None
 
+    def mark(self):
+        """ Cheap pointer snapshot to go back to with :meth:`rewind`. It's just an absolute file offset.
+
+        >>> b = Buffer(b'0123456789', 0, 3)
+        >>> m = b.mark()
+        >>> b.read(7)
+        b'0123456'
+        >>> b.rewind(m)
+        >>> b.next()
+        b'0'
+        """
+        return self.data_offset + self.index
+
+    def rewind(self, mark):
+        """ Moves pointer back (or forth) to the mark. No reads while the mark is within the loaded data. """
+        self._seek(mark)
+
     def get_state(self):
-        return {a: getattr(self, a) for a in self.state_attrs}
+        """ Buffer state snapshot. Contains pointer offset only and doesn't hold any data. """
+        return {'position': self.mark()}
 
     def set_state(self, state):
-        for k, v in state.items():
-            setattr(self, k, v)
-        self.fileobj.seek(self.last_block_offset)
+        self.rewind(state['position'])
+
+    def close(self):
+        """ Nothing to release: file object belongs to the caller """
+        pass
+
+
+class MMapBuffer(Buffer):
+    """
+    Buffer over a memory-mapped file. The whole file is always available,
+    so there are no block reads and no data growth: moving the pointer is just an index change.
+
+    Accepts either a file path or a binary file object having a real file descriptor.
+    Byte strings and file-like objects without a descriptor are served from memory.
+
+    >>> b = MMapBuffer(b"123", 0)
+    >>> b.next()
+    b'1'
+    >>> b.current
+    b'2'
+    >>> b.read(2)
+    b'23'
+    >>> b.next() is None
+    True
+
+    >>> b = MMapBuffer(b"123", -2)
+    >>> b.prev()
+    b'3'
+    >>> b.read_backward(2)
+    b'12'
+    >>> b.prev() is None
+    True
+
+    Zero-copy slices
+
+    >>> b = MMapBuffer(b"123", 1)
+    >>> v = b.read_view(5)
+    >>> isinstance(v, memoryview), bytes(v)
+    (True, b'23')
+    """
+
+    def __init__(self, fileobj, offset=0, block_size=1024):
+        self.fileobj = None
+        self.mmap = None
+        self._owns_file = False
+        if isinstance(fileobj, (str, os.PathLike)):
+            fileobj = open(fileobj, "rb")
+            self._owns_file = True
+
+        if isinstance(fileobj, (bytes, bytearray, memoryview)):
+            data = bytes(fileobj)
+        else:
+            self.fileobj = fileobj
+            try:
+                data = self.mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                # no real file descriptor (BytesIO etc.) or an empty file
+                fileobj.seek(0)
+                data = fileobj.read()
+
+        # the whole file is always loaded
+        self.data = data
+        self.view = memoryview(data)
+        self.data_offset = 0
+        self.offset = offset
+        self.block_size = block_size
+        self.index = None
+        self.reset(offset)
+        self.stack = []
+
+    def _read_forward(self, size=None):
+        raise EOFException()
+
+    def _read_backward(self, size=None):
+        raise EOFException()
+
+    def _read_head(self, offset):
+        self.index = offset
+
+    def _read_tail(self, offset):
+        # same as for regular buffer: negative offset sets pointer to the last byte
+        self.index = len(self.data) - 1
+
+    def finditer(self, regex, chunk_size=None):
+        """ The whole file is mapped, so just one pass over it """
+        for m in regex.finditer(self.data):
+            yield m.start(), m
+
+    def read_at(self, offset, n):
+        return bytes(self.data[offset:offset + n])
+
+    def read_view(self, n):
+        start = max(self.index, 0)
+        res = self.view[start:self.index + n]
+        self.index += n
+        return res
+
+    def close(self):
+        """ Releases the mapping and the file if it was opened by the buffer """
+        try:
+            self.view.release()
+            if self.mmap is not None:
+                self.mmap.close()
+        except BufferError:
+            # some views on the mapping are still alive; leave it to the garbage collector
+            return
+        if self._owns_file:
+            self.fileobj.close()
 
 
 if __name__ == "__main__":
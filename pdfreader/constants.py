@@ -14,6 +14,14 @@ WHITESPACE_CODES = [ord(c) for c in WHITESPACES]
 
 EOL = (CR + LF, LF + CR, CR, LF)
 
+# default size of data chunks for streamed stream decoding
+STREAM_CHUNK_SIZE = 65536
+
+#: number of color components by color space name including inline image abbreviations
+COLOR_COMPONENTS = {'DeviceGray': 1, 'G': 1, 'CalGray': 1, 'Indexed': 1, 'I': 1,
+                    'DeviceRGB': 3, 'RGB': 3, 'CalRGB': 3, 'Lab': 3,
+                    'DeviceCMYK': 4, 'CMYK': 4}
+
 TYPE_BOOL = "bool"
 TYPE_INT = "int"
 TYPE_REAL = "real"
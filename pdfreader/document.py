@@ -1,6 +1,9 @@
 import logging
 log = logging.getLogger(__name__)
 
+from decimal import Decimal
+
+from .index import DocumentIndex
 from .registry import Registry
 from .parsers import RegistryPDFParser
 from .securityhandler import security_handler_factory
@@ -13,7 +16,19 @@ class PDFDocument(object):
     Represents PDF document structure
 
     :param fobj: file-like object: binary file descriptor, BytesIO stream etc.
+                 or a file path. Files given by path are memory-mapped and closed with the document.
     :param password: Optional. Password to access PDF content. Defaults to the empty string.
+    :param real_type: Optional. Type of real numbers: :class:`~decimal.Decimal` (default) or float.
+                      Floats make parsing of content-heavy documents noticeably faster.
+    :param index_path: Optional. Path to the document index file. If the index was saved for this very file
+                       the document structure is taken from it instead of parsing.
+                       Otherwise the index is (re)built and saved there. See :meth:`save_index`.
+    :param max_registry_size: Optional. Memory budget for parsed objects kept by the document, bytes.
+                              The least recently used objects are dropped and parsed again on demand.
+                              Unlimited by default.
+    :param max_decoded_size: Optional. Limit of decoded data size for every stream, bytes.
+                             Protects from decompression bombs: decoding stops at the limit and the data is truncated.
+                             Unlimited by default.
 
     """
     #: contains PDF file header data
@@ -23,13 +38,16 @@ class PDFDocument(object):
     #: references to document's Catalog instance
     root = None
 
-    def __init__(self, fobj, password=''):
+    def __init__(self, fobj, password='', real_type=Decimal, index_path=None, max_registry_size=None,
+                 max_decoded_size=None):
         """ Constructor method
         """
+        self.real_type = real_type
+        self.registry = Registry(real_type=real_type, max_size=max_registry_size)
 
-        self.registry = Registry()
-
-        self.parser = RegistryPDFParser(fobj, self.registry)
+        index = DocumentIndex.load(index_path, real_type=real_type) if index_path else None
+        self.parser = RegistryPDFParser(fobj, self.registry, real_type=real_type, index=index,
+                                        max_decoded_size=max_decoded_size)
         self.header = self.parser.header
         self.trailer = self.parser.trailer
 
@@ -42,11 +60,25 @@ class PDFDocument(object):
 
         self.root = self.obj_by_ref(self.trailer.root)
 
+        if index_path and not self.parser.index:
+            try:
+                self.save_index(index_path)
+            except (OSError, TypeError):
+                log.warning("Can't save document index {}".format(index_path), exc_info=True)
+
     def __enter__(self):
         return self
 
     def __exit__(self, type, value, traceback):
-        return
+        self.close()
+
+    def close(self):
+        """
+        Releases the file mapping if the document was open by file path.
+        File objects passed by the caller stay open.
+        Data of big streams is read from the file on the first access, so it's not available after closing.
+        """
+        self.parser.buffer.close()
 
     @cached_property
     def encrypt(self):
@@ -140,8 +172,20 @@ class PDFDocument(object):
 
         :return:  :class:`~pdfreader.types.objects.Page` generator.
         """
+        if self.parser.index and self.parser.index.pages is not None:
+            # no page tree walk for documents open with index
+            return (self.obj_by_ref(ref) for ref in self.parser.index.pages)
         return self.root.Pages.pages()
 
+    def save_index(self, path):
+        """
+        Saves document index file: header, trailer, merged xref (including object streams membership)
+        and page references. Re-opening the same file with `index_path` skips all these parsing steps.
+
+        :param path: index file path
+        """
+        DocumentIndex.from_document(self).save(path)
+
     @property
     def metadata(self):
         """
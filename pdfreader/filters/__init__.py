@@ -1,5 +1,10 @@
+import logging
+log = logging.getLogger(__name__)
+
 from itertools import product, chain
 
+from ..constants import STREAM_CHUNK_SIZE
+
 from . import ascii85, asciihex, flate, lzw, runlength, ccittfax,  dct, jbig2, jpx, crypt
 
 decoders = (ascii85, asciihex, flate, lzw, runlength, ccittfax, dct, jbig2, jpx, crypt)
@@ -7,11 +12,72 @@ decoders = (ascii85, asciihex, flate, lzw, runlength, ccittfax, dct, jbig2, jpx,
 decoders_by_name = dict(chain.from_iterable(list(product(m.filter_names, [m])) for m in decoders))
 
 
-def apply_filter(name, binary, params=None):
+def apply_filter(name, binary, params=None, max_length=None):
+    """ Decodes data
+
+    :param max_length: Optional. Limit of decoded data size. If set, data is decoded incrementally
+                       and decoding stops as soon as the limit is exceeded. Decoded data is truncated then.
+
+    >>> from zlib import compress
+    >>> apply_filter('FlateDecode', compress(bytes(10**7)), max_length=10)
+    b'\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00'
+    """
     decoder = decoders_by_name.get(name)
     if decoder is None:
         raise NotImplementedError(decoder)
-    return decoder.decode(binary, params or {})
+    if max_length is None:
+        return decoder.decode(binary, params or {})
+    data, truncated = read_limited(iter_apply_filter(name, [binary], params), max_length)
+    if truncated:
+        log.warning("{} decoded data exceeds {} bytes. Truncated.".format(name, max_length))
+    return data
+
+
+def read_limited(chunks, max_length):
+    """ Joins data chunks up to max_length bytes. The rest isn't even requested.
+
+    :return: data and a flag telling if there was more data
+
+    >>> read_limited(iter([b'abc', b'def', b'ghi']), 4)
+    (b'abcd', True)
+    >>> read_limited(iter([b'abc', b'def']), 6)
+    (b'abcdef', False)
+    """
+    res, size = [], 0
+    for chunk in chunks:
+        if size + len(chunk) > max_length:
+            res.append(chunk[:max_length - size])
+            return b''.join(res), True
+        res.append(chunk)
+        size += len(chunk)
+    return b''.join(res), False
+
+
+def iter_apply_filter(name, chunks, params=None, chunk_size=STREAM_CHUNK_SIZE):
+    """ Decodes data coming in chunks. Returns decoded chunks iterator.
+        Filters without incremental decoder get the whole data at once.
+
+    >>> from zlib import compress
+    >>> data = compress(b'sample data')
+    >>> b''.join(iter_apply_filter('FlateDecode', [data[:5], data[5:]]))
+    b'sample data'
+    >>> list(iter_apply_filter('JBIG2Decode', [b'r', b'aw']))
+    [b'raw']
+    >>> iter_apply_filter('Unknown', [b'raw'])
+    Traceback (most recent call last):
+    ...
+    NotImplementedError: Unknown
+    """
+    decoder = decoders_by_name.get(name)
+    if decoder is None:
+        raise NotImplementedError(name)
+    if hasattr(decoder, 'iter_decode'):
+        return decoder.iter_decode(chunks, params or {}, chunk_size)
+    return _iter_decode_at_once(decoder, chunks, params or {})
+
+
+def _iter_decode_at_once(decoder, chunks, params):
+    yield decoder.decode(b''.join(chunks), params)
 
 # Not implemented:
 # - dct
@@ -1,12 +1,46 @@
 import logging
 log = logging.getLogger(__name__)
 
-from base64 import  a85decode
+import struct
 
 from ..constants import WHITESPACES
 
 filter_names = ('ASCII85Decode', 'A85')
 
+WHITESPACE_CHARS = b''.join(WHITESPACES)
+
+# ! ... u characters -> digits 0 ... 84
+DIGITS = bytes(range(256)).translate(bytes(range(33)) + bytes(range(85)) + bytes(256 - 118))
+ALPHABET = bytes(range(33, 118))
+
+
+def a85decode(data):
+    """ Decodes Ascii85 data without whitespaces and EOD marker. Groups are converted to 32-bit integers at once.
+
+    >>> a85decode(b'F(&p)Ch4`"@<>oXz!!!!')
+    b'sample data\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00'
+    >>> a85decode(b'F(z')
+    Traceback (most recent call last):
+    ...
+    ValueError: z inside Ascii85 5-tuple
+    """
+    if b'z' in data:
+        groups = data.split(b'z')
+        if any(len(g) % 5 for g in groups[:-1]):
+            raise ValueError("z inside Ascii85 5-tuple")
+        data = b'!!!!!'.join(groups)
+    if data.translate(None, ALPHABET):
+        raise ValueError("Non-Ascii85 digit found")
+    # the last incomplete group is padded with the highest digit
+    padding = -len(data) % 5
+    digits = data.translate(DIGITS) + b'\x54' * padding
+    values = [(((a * 85 + b) * 85 + c) * 85 + d) * 85 + e for a, b, c, d, e in zip(*[iter(digits)] * 5)]
+    try:
+        res = struct.pack('>{}L'.format(len(values)), *values)
+    except struct.error:
+        raise ValueError("Ascii85 group overflow")
+    return res[:len(res) - padding] if padding else res
+
 
 def decode(data, *_):
     """
@@ -19,9 +53,7 @@ def decode(data, *_):
     >>> decode(data)
     b''
     """
-    # filter whitespaces
-    ws = b''.join(WHITESPACES)
-    data = bytes([n for n in data if n not in ws])
+    data = data.translate(None, WHITESPACE_CHARS)
     try:
         if data.endswith(b'~>'):
             res = a85decode(data[:-2])
@@ -33,6 +65,47 @@ def decode(data, *_):
     return res
 
 
+def iter_decode(chunks, *_):
+    """ Decodes data coming in chunks
+
+    >>> from base64 import a85encode
+    >>> data = a85encode(b'sample data' + bytes(8)) + b'~>'
+    >>> data
+    b'F(&p)Ch4`"@<>oXz!!!!~>'
+    >>> b''.join(iter_decode([data[:3], b' \\n' + data[3:14], data[14:21], data[21:]]))
+    b'sample data\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00'
+
+    >>> list(iter_decode([b"BROKEN_xyz_STREAM~>"]))
+    []
+
+    'z' inside a group is an error in any chunk
+
+    >>> list(iter_decode([b"F(z!!!!!!", b"~>"]))
+    []
+    """
+    tail = b''
+    for chunk in chunks:
+        data = tail + chunk.translate(None, WHITESPACE_CHARS)
+        end = data.find(b'~>')
+        if end >= 0:
+            data, tail = data[:end], b''
+        else:
+            # 'z' stands for a whole group of zeros: complete groups end either at the last 'z' or by 5 after it.
+            # Keep a trailing '~' which may start EOD
+            n = len(data.rstrip(b'~'))
+            n -= (n - data.rfind(b'z', 0, n) - 1) % 5
+            data, tail = data[:n], data[n:]
+        try:
+            if data:
+                yield a85decode(data)
+        except ValueError:
+            log.exception("Skipping broken stream")
+            return
+        if end >= 0:
+            return
+    log.error("EOD ~> expected. Skipping the rest of the stream.")
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -1,7 +1,13 @@
 import logging
 log = logging.getLogger(__name__)
 
-from ..constants import WHITESPACES, DEFAULT_ENCODING
+import re
+from binascii import unhexlify
+
+from ..constants import WHITESPACES
+
+WHITESPACE_CHARS = b''.join(WHITESPACES)
+NON_HEX = re.compile(b'[^0-9A-Fa-f]')
 
 
 filter_names = ('ASCIIHexDecode', 'AHx')
@@ -24,29 +30,76 @@ def decode(data, *_):
     >>> data = b"BROKEN_STREAM>"
     >>> decode(data)
     b''
+
+    >>> data = b"64617461 2X73616d706c65>"
+    >>> decode(data)
+    b'data'
+    """
+    data = data.translate(None, WHITESPACE_CHARS)
+    end = data.find(b">")
+    if end >= 0:
+        data = data[:end]
+    if len(data) % 2:
+        data += b"0"
+    res, _ = _unhexlify(data)
+    return res
+
+
+def _unhexlify(data):
+    """ Decodes hex digits up to the first invalid character
+
+    :return: decoded bytes and True if the data is broken
+
+    >>> _unhexlify(b"6461"), _unhexlify(b"64617X")
+    ((b'da', False), (b'da', True))
     """
-    buffer = b""
-    res = b""
     try:
-        for i in range(0, len(data)):
-            c = data[i:i + 1]
-            if c in WHITESPACES:
-                continue
-            elif c == b">":
-                break
-            buffer += c
-            if len(buffer) > 1:
-                res += bytes.fromhex(buffer.decode(DEFAULT_ENCODING))
-                buffer = b""
-
-        if buffer:
-            if len(buffer) == 1:
-                buffer += b"0"
-            res += bytes.fromhex(buffer.decode(DEFAULT_ENCODING))
+        return unhexlify(data), False
     except ValueError:
-        # invalid characters on stream
+        # invalid characters on stream: keep the data before them
         log.exception("Skipping broken stream")
-    return res
+        n = NON_HEX.search(data).start()
+        return unhexlify(data[:n - n % 2]), True
+
+
+def iter_decode(chunks, *_):
+    """ Decodes data coming in chunks
+
+    >>> list(iter_decode([b"6461746", b"1207 3616d\\n706c652", b">6162"]))
+    [b'dat', b'a sample', b' ']
+
+    >>> list(iter_decode([b"646", b"17"]))
+    [b'd', b'a', b'p']
+
+    >>> list(iter_decode([b"64BROKEN_STREAM>"]))
+    [b'd']
+
+    >>> list(iter_decode([b"646174612X73"])), list(iter_decode([b"6461", b"7X"]))
+    ([b'data'], [b'da'])
+    """
+    tail = b''
+    for chunk in chunks:
+        data = tail + chunk.translate(None, WHITESPACE_CHARS)
+        end = data.find(b'>')
+        if end >= 0:
+            data, tail = data[:end], b''
+            if len(data) % 2:
+                data += b'0'
+        else:
+            n = len(data) - len(data) % 2
+            data, tail = data[:n], data[n:]
+        if data:
+            res, broken = _unhexlify(data)
+            if res:
+                yield res
+            if broken:
+                return
+        if end >= 0:
+            return
+    if tail:
+        res, _ = _unhexlify(tail + b'0')
+        if res:
+            yield res
 
 
 if __name__ == "__main__":
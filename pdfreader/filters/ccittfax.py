@@ -4,6 +4,9 @@
 #
 # Bugs: uncompressed mode untested.
 #
+# PDF streams are decoded with the table-driven FaxDecoder below; its code tables are built from the
+# CCITTG4Parser code trees.
+#
 #  cf.
 #   ITU-T Recommendation T.4
 #     "Standardization of Group 3 facsimile terminals for document transmission"
@@ -539,19 +542,220 @@ class CCITTFaxDecoder(CCITTG4Parser):
         self._buf += bytes.tobytes()
 
 
+##  Table-driven decoder
+##
+def _lookup_table(tree, n_bits):
+    """ Builds a table mapping the next n_bits of data to (value, code length) from a code tree.
+        Codes longer than n_bits are left out, zero length marks an invalid code.
+
+    >>> table = _lookup_table(CCITTG4Parser.MODE, 7)
+    >>> table[0b1000000], table[0b0110000], table[0b0001000], table[0]
+    ((0, 1), (1, 3), ('p', 4), (None, 0))
+    """
+    table = [(None, 0)] * (1 << n_bits)
+
+    def walk(node, code, length):
+        for bit in (0, 1):
+            child = node[bit]
+            if isinstance(child, list):
+                walk(child, code << 1 | bit, length + 1)
+            elif child is not None and length < n_bits:
+                shift = n_bits - length - 1
+                start = (code << 1 | bit) << shift
+                table[start:start + (1 << shift)] = [(child, length + 1)] * (1 << shift)
+
+    walk(tree, 0, 0)
+    return table
+
+
+# the longest run length code is 13 bits, the longest mode code is 7 bits except extensions
+RUN_BITS, MODE_BITS = 13, 7
+RUN_MASK, MODE_MASK = (1 << RUN_BITS) - 1, (1 << MODE_BITS) - 1
+EOL_BITS, EOL = 12, 1
+
+#: run length tables by color: 0 - white, 1 - black
+RUN_TABLES = (_lookup_table(CCITTG4Parser.WHITE, RUN_BITS), _lookup_table(CCITTG4Parser.BLACK, RUN_BITS))
+MODE_TABLE = _lookup_table(CCITTG4Parser.MODE, MODE_BITS)
+
+
+class FaxDecoder(object):
+    """ Table-driven CCITT Group 3 and Group 4 decoder. Codes are looked up by several bits at once.
+        Rows are decoded to lists of changing elements: positions where color changes, starting with white.
+        Output rows are packed from whole runs.
+
+        :param columns: image width in pixels
+        :param k: 0 - Group 3 1-D (Modified Huffman), > 0 - Group 3 mixed 1-D and 2-D, < 0 - Group 4 2-D
+        :param rows: number of rows to decode, 0 - until the end of data
+        :param byte_align: rows (or EOL codes) are aligned to bytes
+        :param black_is_1: 1 bits stand for black pixels
+
+    8 pixels wide black stripe in the middle of 2 rows. Group 4 with end of facsimile block:
+
+    >>> data = bytes([0b00110110, 0b00101111, 0b10000000, 0b00001000, 0b00000000, 0b10000000])
+    >>> FaxDecoder(16, k=-1).decode(data)
+    b'\\xf0\\x0f\\xf0\\x0f'
+
+    Group 3 1-D with EOLs:
+
+    >>> data = bytes([0b00000000, 0b00011011, 0b00010110, 0b11000000, 0b00000110, 0b11000101, 0b10110000])
+    >>> FaxDecoder(16, k=0, black_is_1=True).decode(data)
+    b'\\x0f\\xf0\\x0f\\xf0'
+    """
+
+    def __init__(self, columns=1728, k=0, rows=0, byte_align=False, black_is_1=False):
+        self.columns = columns
+        self.k = k
+        self.rows = rows
+        self.byte_align = byte_align
+        self.black_is_1 = black_is_1
+
+    def decode(self, data):
+        n_bits = len(data) * 8
+        # reading ahead past the end gives zeros
+        data = bytes(data) + bytes(4)
+        res = []
+        # changing elements of the imaginary white line above the first one
+        ref = []
+        pos = 0
+        while pos < n_bits and not (self.rows and len(res) >= self.rows):
+            if res and self.byte_align:
+                pos = (pos + 7) & ~7
+            two_d = self.k < 0
+            if self.k >= 0:
+                # fill bits and EOL
+                while pos < n_bits and self._peek(data, pos, EOL_BITS) == 0:
+                    pos += 1
+                if self._peek(data, pos, EOL_BITS) == EOL:
+                    pos += EOL_BITS
+                    if self.k > 0:
+                        two_d = not self._peek(data, pos, 1)
+                        pos += 1
+                    # end of block: EOLs in a row
+                    if self._peek(data, pos, EOL_BITS) == EOL:
+                        break
+                elif self.k > 0:
+                    two_d = not self._peek(data, pos, 1)
+                    pos += 1
+                if pos >= n_bits:
+                    break
+
+            try:
+                if two_d:
+                    changes, pos = self._decode_2d(data, pos, ref)
+                else:
+                    changes, pos = self._decode_1d(data, pos)
+            except ValueError as e:
+                if self.k < 0 and self._peek(data, pos, EOL_BITS) == EOL:
+                    # end of facsimile block
+                    break
+                if any(data[(pos + 7) // 8:]) or self._peek(data, pos, 8 - pos % 8):
+                    log.warning("Broken CCITT stream at row {}: {}".format(len(res), e))
+                break
+            res.append(self._pack_row(changes))
+            ref = changes
+        return b''.join(res)
+
+    @staticmethod
+    def _peek(data, pos, n):
+        i = pos >> 3
+        return (int.from_bytes(data[i:i + 4], 'big') >> (32 - (pos & 7) - n)) & ((1 << n) - 1)
+
+    def _run(self, data, pos, color):
+        """ Reads makeup codes and the terminating code of a run """
+        table = RUN_TABLES[color]
+        from_bytes = int.from_bytes
+        total = 0
+        while True:
+            i = pos >> 3
+            value, length = table[(from_bytes(data[i:i + 4], 'big') >> (32 - RUN_BITS - (pos & 7))) & RUN_MASK]
+            if not length:
+                raise ValueError("invalid {} run code".format("black" if color else "white"))
+            pos += length
+            total += value
+            if value < 64:
+                return total, pos
+
+    def _decode_1d(self, data, pos):
+        width = self.columns
+        changes = []
+        a0, color = 0, 0
+        while a0 < width:
+            run, pos = self._run(data, pos, color)
+            a0 += run
+            if a0 < width:
+                self._add_change(changes, a0)
+            color = 1 - color
+        return changes, pos
+
+    def _decode_2d(self, data, pos, ref):
+        width = self.columns
+        from_bytes, run, add_change = int.from_bytes, self._run, self._add_change
+        refs = ref + [width] * 3
+        changes = []
+        a0, color = -1, 0
+        j = 0
+        while a0 < width:
+            # b1 - the first changing element of the reference line to the right of a0 and of the opposite color
+            while refs[j] <= a0:
+                j += 1
+            b = j + ((j ^ color) & 1)
+
+            i = pos >> 3
+            mode, length = MODE_TABLE[(from_bytes(data[i:i + 4], 'big') >> (32 - MODE_BITS - (pos & 7))) & MODE_MASK]
+            if not length:
+                raise ValueError("invalid or unsupported mode code")
+            pos += length
+            if mode == 'p':
+                a0 = refs[b + 1]
+            elif mode == 'h':
+                a1, pos = run(data, pos, color)
+                a2, pos = run(data, pos, 1 - color)
+                a1 += max(a0, 0)
+                a2 += a1
+                add_change(changes, a1)
+                add_change(changes, a2)
+                a0 = a2
+            else:
+                a0 = min(max(refs[b] + mode, a0, 0), width)
+                if a0 < width:
+                    if changes and changes[-1] == a0:
+                        changes.pop()
+                    else:
+                        changes.append(a0)
+                color = 1 - color
+        return changes, pos
+
+    def _add_change(self, changes, x):
+        if x >= self.columns:
+            return
+        if changes and changes[-1] == x:
+            # zero length run: two color changes cancel each other
+            changes.pop()
+        else:
+            changes.append(x)
+
+    def _pack_row(self, changes):
+        """ Packs a row from black runs """
+        width = self.columns
+        n_bits = (width + 7) // 8 * 8
+        ends = changes[1::2]
+        if len(changes) % 2:
+            ends.append(width)
+        black = 0
+        for start, end in zip(changes[::2], ends):
+            black |= ((1 << (end - start)) - 1) << (n_bits - end)
+        if not self.black_is_1:
+            black ^= ((1 << width) - 1) << (n_bits - width)
+        return black.to_bytes(n_bits // 8, 'big')
+
+
 def ccittfaxdecode(data, params):
-    K = params.get('K')
-    cols = params.get('Columns')
-    bytealign = params.get('EncodedByteAlign')
-    reversed = params.get('BlackIs1')
-    if K == -1:
-        parser = CCITTFaxDecoder(cols, bytealign=bytealign, reversed=reversed)
-    else:
-        log.warning("CCITT 1d and 2d decoders are not implemented. Returning raw unfiltered data.")
-        return data
-    parser.feedbytes(data)
-    return parser.close()
+    decoder = FaxDecoder(params.get('Columns', 1728),
+                         k=params.get('K', 0),
+                         rows=params.get('Rows', 0),
+                         byte_align=bool(params.get('EncodedByteAlign')),
+                         black_is_1=bool(params.get('BlackIs1')))
+    return decoder.decode(data)
 
 
 decode = ccittfaxdecode
-
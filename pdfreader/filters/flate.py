@@ -2,7 +2,8 @@ import zlib
 import logging
 log = logging.getLogger(__name__)
 
-from .predictors import _remove_predictors
+from ..constants import STREAM_CHUNK_SIZE
+from .predictors import _remove_predictors, _iter_remove_predictors
 
 filter_names = ('FlateDecode', 'Fl')
 
@@ -20,13 +21,50 @@ def decode(data, params):
     """
     try:
         data = zlib.decompress(data)
-        data = _remove_predictors(data, params.get("Predictor"), params.get("Columns"))
+        data = _remove_predictors(data, params.get("Predictor"), params.get("Columns"), params.get("Colors"),
+                                  params.get("BitsPerComponent"))
     except zlib.error:
         log.exception("Skipping broken stream")
         data = b''
     return data
 
 
+
+def iter_decode(chunks, params, chunk_size=STREAM_CHUNK_SIZE):
+    """ Decodes data coming in chunks. Each decompression step produces at most chunk_size bytes,
+        so memory stays bounded whatever the compression ratio is.
+
+    >>> from zlib import compress
+    >>> data = compress(b'sample data' * 1000)
+    >>> chunks = list(iter_decode([data[:10], data[10:]], dict(), chunk_size=4096))
+    >>> max(len(c) for c in chunks), b''.join(chunks) == b'sample data' * 1000
+    (4096, True)
+
+    >>> list(iter_decode([b"BROKEN_STREAM"], dict()))
+    []
+    """
+    return _iter_remove_predictors(_iter_decompress(chunks, chunk_size), params.get("Predictor"), params.get("Columns"),
+                                  params.get("Colors"), params.get("BitsPerComponent"))
+
+
+def _iter_decompress(chunks, chunk_size):
+    d = zlib.decompressobj()
+    try:
+        for chunk in chunks:
+            while chunk and not d.eof:
+                data = d.decompress(chunk, chunk_size)
+                chunk = d.unconsumed_tail
+                if data:
+                    yield data
+        data = d.flush()
+        if data:
+            yield data
+    except zlib.error:
+        log.exception("Skipping broken stream")
+        return
+    if not d.eof:
+        log.warning("Truncated stream")
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -1,13 +1,13 @@
-# Taken from https://github.com/joeatwork/python-lzw/blob/master/lzw/__init__.py
-# As the most recent version was not found on pypi
-# - Removed six dependency as no py2 compatibility required.
-# - Removed encoder part as we don't need it
-# - added decode() for PDF streams support
+""" LZW decoder for PDF streams
 
+    Variable width codes are read from an integer bit accumulator. Dictionary entries are kept in a table indexed
+    by code: each new entry is a known entry (prefix) plus one byte (suffix).
+"""
+import logging
+log = logging.getLogger(__name__)
 
-import struct, logging
-
-from .predictors import _remove_predictors
+from ..constants import STREAM_CHUNK_SIZE
+from .predictors import _remove_predictors, _iter_remove_predictors
 
 filter_names = ('LZWDecode', 'LZW')
 
@@ -17,6 +17,13 @@ END_OF_INFO_CODE = 257
 DEFAULT_MIN_BITS = 9
 DEFAULT_MAX_BITS = 12
 
+#: max size of the table: codes are at most 12 bits wide
+MAX_TABLE_SIZE = 1 << DEFAULT_MAX_BITS
+
+#: input bytes decoded at once in streaming mode: a code can't expand to more than 4096 bytes,
+#: so each step produces about 3 MB at most
+FEED_SIZE = 1024
+
 
 def decode(data, params):
     """
@@ -24,278 +31,132 @@ def decode(data, params):
     >>> decode(data, dict(Predictor=1))
     b'sample text'
 
+    >>> decode(b'\\x80\\x0b\\x60\\x50\\x22\\x0c\\x0c\\x85\\x01', dict())
+    b'-----A---B'
+    >>> decode(b'\\x80\\x0b\\x60\\x50\\x22\\x0c\\x0c\\x85\\x01', dict(EarlyChange=0))
+    b'-----A---B'
     """
     try:
-        data = decompress(data)
-        data = _remove_predictors(data, params.get("Predictor"), params.get("Columns"))
+        data = decompress(data, params.get("EarlyChange", 1))
+        data = _remove_predictors(data, params.get("Predictor"), params.get("Columns"), params.get("Colors"),
+                                  params.get("BitsPerComponent"))
     except ValueError:
-        logging.exception("Skipping broken stream")
+        log.exception("Skipping broken stream")
         data = b''
     return data
 
 
-def decompress(compressed_bytes):
+def iter_decode(chunks, params, chunk_size=STREAM_CHUNK_SIZE):
+    """ Decodes data coming in chunks
+
+    >>> data = b'9\\x98M\\xa7\\x03a\\x94@t2\\x9e\\x0e\\x90\\x00'
+    >>> list(iter_decode([data[:5], data[5:]], dict(Predictor=1), chunk_size=4))
+    [b'samp', b'le t', b'ext']
+    """
+    return _iter_remove_predictors(_iter_decompress(chunks, chunk_size, params.get("EarlyChange", 1)),
+                                  params.get("Predictor"), params.get("Columns"), params.get("Colors"),
+                                  params.get("BitsPerComponent"))
+
+
+def _iter_decompress(chunks, chunk_size, early_change=1):
+    decoder = LZWDecoder(early_change)
+    res = bytearray()
+    for chunk in chunks:
+        for i in range(0, len(chunk), FEED_SIZE):
+            res += decoder.feed(chunk[i:i + FEED_SIZE])
+            n = len(res) - len(res) % chunk_size
+            for j in range(0, n, chunk_size):
+                yield bytes(res[j:j + chunk_size])
+            del res[:n]
+            if decoder.finished:
+                break
+        if decoder.finished:
+            break
+    if res:
+        yield bytes(res)
+
+
+def decompress(compressed_bytes, early_change=1):
     """
     >>> decompress(b'9\\x98M\\xa7\\x03a\\x94@t2\\x9e\\x0e\\x90\\x00')
     b'sample text'
 
     """
-    decoder = ByteDecoder()
-    return decoder.decodefrombytes(compressed_bytes)
-
-
-class ByteDecoder(object):
-    """
-    Decodes, combines bit-unpacking and interpreting a codepoint
-    stream, suitable for use with bytes generated by
-    L{ByteEncoder}.
-
-    See L{ByteDecoder} for a usage example.
-    """
+    return bytes(LZWDecoder(early_change).feed(compressed_bytes))
 
-    def __init__(self):
-        """
-        """
-
-        self._decoder = Decoder()
-        self._unpacker = BitUnpacker(initial_code_size=self._decoder.code_size())
-        self.remaining = []
-
-    def decodefrombytes(self, bytesource):
-        """
-        Given an iterator over BitPacked, Encoded bytes, Returns an
-        iterator over the uncompressed bytes. Dual of
-        L{ByteEncoder.encodetobytes}. See L{ByteEncoder} for an
-        example of use.
-        """
-        codepoints = self._unpacker.unpack(bytesource)
-        clearbytes = self._decoder.decode(codepoints)
 
-        return clearbytes
+class LZWDecoder(object):
+    """ Incremental LZW decoder. Data may be fed in pieces of any size.
+        Decoding stops at the end of information code or on a broken code.
 
+        :param early_change: /EarlyChange value: 1 if code width is increased one code early
 
-class BitUnpacker(object):
-    """
-    An adaptive-width bit unpacker, intended to decode streams written
-    by L{BitPacker} into integer codepoints. Like L{BitPacker}, knows
-    about code size changes and control codes.
+    >>> decoder = LZWDecoder()
+    >>> data = b'\\x80\\x0b\\x60\\x50\\x22\\x0c\\x0c\\x85\\x01'
+    >>> decoder.feed(data[:4]), decoder.feed(data[4:]), decoder.finished
+    (bytearray(b'---'), bytearray(b'--A---B'), True)
     """
 
-    def __init__(self, initial_code_size):
-        """
-        initial_code_size is the starting size of the codebook
-        associated with the to-be-unpacked stream.
-        """
-        self._initial_code_size = initial_code_size
-
-    def unpack(self, bytesource):
-        """
-        Given an iterator of bytes, returns an iterator of integer
-        code points. Auto-magically adjusts point width when it sees
-        an almost-overflow in the input stream, or an LZW CLEAR_CODE
-        or END_OF_INFO_CODE
-
-        Trailing bits at the end of the given iterator, after the last
-        codepoint, will be dropped on the floor.
-
-        At the end of the iteration, or when an END_OF_INFO_CODE seen
-        the unpacker will ignore the bits after the code until it
-        reaches the next aligned byte. END_OF_INFO_CODE will *not*
-        stop the generator, just reset the alignment and the width
+    def __init__(self, early_change=1):
+        self.early_change = early_change
+        self.finished = False
+        # code -> bytes; clear and end of information codes have no entries
+        self.table = [bytes((i,)) for i in range(256)] + [None, None]
+        self.prev = None
+        self.width = DEFAULT_MIN_BITS
+        # pending bits: value and the number of bits
+        self.acc = 0
+        self.n_bits = 0
 
+    def feed(self, data):
+        """ Decodes the next portion of data
 
-        >>> unpk = BitUnpacker(initial_code_size=258)
-        >>> [ i for i in unpk.unpack([0x00, 0xC0, 0x40]) ]
-        [1, 257]
+        :return: bytearray of decoded bytes
         """
-        bits = []
-        offset = 0
-        ignore = 0
-
-        codesize = self._initial_code_size
-        minwidth = 8
-        while (1 << minwidth) < codesize:
-            minwidth = minwidth + 1
-
-        pointwidth = minwidth
-
-        for nextbit in bytestobits(bytesource):
-
-            offset = (offset + 1) % 8
-            if ignore > 0:
-                ignore = ignore - 1
+        out = bytearray()
+        if self.finished:
+            return out
+        table, prev, width = self.table, self.prev, self.width
+        acc, n_bits = self.acc, self.n_bits
+        early_change = self.early_change
+        for byte in data:
+            acc = acc << 8 | byte
+            n_bits += 8
+            if n_bits < width:
                 continue
-
-            bits.append(nextbit)
-
-            if len(bits) == pointwidth:
-                codepoint = intfrombits(bits)
-                bits = []
-
-                yield codepoint
-
-                codesize = codesize + 1
-
-                if codepoint in [CLEAR_CODE, END_OF_INFO_CODE]:
-                    codesize = self._initial_code_size
-                    pointwidth = minwidth
-                else:
-                    # is this too late?
-                    while codesize >= (2 ** pointwidth):
-                        pointwidth = pointwidth + 1
-
-                if codepoint == END_OF_INFO_CODE:
-                    ignore = (8 - offset) % 8
-
-
-class Decoder(object):
-    """
-    Uncompresses a stream of lzw code points, as created by
-    L{Encoder}. Given a list of integer code points, with all
-    unpacking foolishness complete, turns that list of codepoints into
-    a list of uncompressed bytes. See L{BitUnpacker} for what this
-    doesn't do.
-    """
-
-    def __init__(self):
-        """
-        Creates a new Decoder. Decoders should not be reused for
-        different streams.
-        """
-        self._clear_codes()
-        self.remainder = []
-
-    def code_size(self):
-        """
-        Returns the current size of the Decoder's code book, that is,
-        it's mapping of codepoints to byte strings. The return value of
-        this method will change as the decode encounters more encoded
-        input, or control codes.
-        """
-        return len(self._codepoints)
-
-    def decode(self, codepoints):
-        """
-        Given an iterable of integer codepoints, yields the
-        corresponding bytes, one at a time, as byte strings of length
-        E{1}. Retains the state of the codebook from call to call, so
-        if you have another stream, you'll likely need another
-        decoder!
-
-        Decoders will NOT handle END_OF_INFO_CODE (rather, they will
-        handle the code by throwing an exception); END_OF_INFO should
-        be handled by the upstream codepoint generator (see
-        L{BitUnpacker}, for example)
-
-        >>> dec = Decoder()
-        >>> dec.decode([103, 97, 98, 98, 97, 32, 258, 260, 262, 121, 111, 263, 259, 261, 256])
-        b'gabba gabba yo gabba'
-
-        """
-        codepoints = [cp for cp in codepoints]
-
-        decoded = b''
-        for cp in codepoints:
-            decoded += self._decode_codepoint(cp)
-        return decoded
-
-    def _decode_codepoint(self, codepoint):
-        """
-        Will raise a ValueError if given an END_OF_INFORMATION
-        code. EOI codes should be handled by callers if they're
-        present in our source stream.
-
-        >>> dec = Decoder()
-        >>> beforesize = dec.code_size()
-        >>> dec._decode_codepoint(0x80) == b'\\x80'
-        True
-        >>> dec._decode_codepoint(0x81) == b'\\x81'
-        True
-        >>> beforesize + 1 == dec.code_size()
-        True
-        >>> dec._decode_codepoint(256) == b''
-        True
-        >>> beforesize == dec.code_size()
-        True
-        """
-
-        ret = b""
-
-        if codepoint == CLEAR_CODE:
-            self._clear_codes()
-        elif codepoint == END_OF_INFO_CODE:
-            raise ValueError("End of information code not supported directly by this Decoder")
-        else:
-            if codepoint in self._codepoints:
-                ret = self._codepoints[codepoint]
-                if None != self._prefix:
-                    self._codepoints[len(self._codepoints)] = self._prefix + ret[0:1]
-
+            # bits left after the code are always less than the minimal code width
+            n_bits -= width
+            code = acc >> n_bits
+            acc &= (1 << n_bits) - 1
+
+            if code == CLEAR_CODE:
+                del table[END_OF_INFO_CODE + 1:]
+                prev, width = None, DEFAULT_MIN_BITS
+                continue
+            if code == END_OF_INFO_CODE:
+                self.finished = True
+                break
+
+            size = len(table)
+            if code < size:
+                entry = table[code]
+                if prev is not None and size < MAX_TABLE_SIZE:
+                    table.append(prev + entry[:1])
+            elif code == size and prev is not None:
+                # the code being defined: previous entry plus its own first byte
+                entry = prev + prev[:1]
+                table.append(entry)
             else:
-                ret = self._prefix + ret[0:1]
-                self._codepoints[len(self._codepoints)] = ret
-
-            self._prefix = ret
-
-        return ret
-
-    def _clear_codes(self):
-        self._codepoints = dict((pt, struct.pack("B", pt)) for pt in range(256))
-        self._codepoints[CLEAR_CODE] = CLEAR_CODE
-        self._codepoints[END_OF_INFO_CODE] = END_OF_INFO_CODE
-        self._prefix = None
-
-
-#########################################
-# Conveniences.
-
-
-def filebytes(fileobj, buffersize=1024):
-    """
-    Convenience for iterating over the bytes in a file. Given a
-    file-like object (with a read(int) method), returns an iterator
-    over the bytes of that file.
-    """
-    buff = fileobj.read(buffersize)
-    while buff:
-        for byte in buff: yield byte
-        buff = fileobj.read(buffersize)
-
-
-def intfrombits(bits):
-    """
-    Given a list of boolean values, interprets them as a binary
-    encoded, MSB-first unsigned integer (with True == 1 and False
-    == 0) and returns the result.
-
-    >>> intfrombits([ 1, 0, 0, 1, 1, 0, 0, 0, 0 ])
-    304
-    """
-    ret = 0
-    lsb_first = [b for b in bits]
-    lsb_first.reverse()
-
-    for bit_index in range(len(lsb_first)):
-        if lsb_first[bit_index]:
-            ret = ret | (1 << bit_index)
-
-    return ret
-
-
-def bytestobits(bytesource):
-    """
-    Breaks a given iterable of bytes into an iterable of boolean
-    values representing those bytes as unsigned integers.
-
-    >>> [ x for x in bytestobits(b"\\x01\\x30") ]
-    [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 0, 0]
-    """
-    for value in bytesource:
-
-        for bitplusone in range(8, 0, -1):
-            bitindex = bitplusone - 1
-            nextbit = 1 & (value >> bitindex)
-            yield nextbit
+                log.warning("Broken LZW stream: unexpected code {}".format(code))
+                self.finished = True
+                break
+            out += entry
+            prev = entry
+            width = min(DEFAULT_MAX_BITS, (len(table) + early_change).bit_length())
+
+        self.prev, self.width = prev, width
+        self.acc, self.n_bits = acc, n_bits
+        return out
 
 
 if __name__ == "__main__":
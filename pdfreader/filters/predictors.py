@@ -1,7 +1,226 @@
+""" LZW/Flate predictors: TIFF predictor 2 and PNG filters
+
+    Rows are processed as a whole: PNG None, Sub and Up rows and TIFF rows of 8/16 bits components are
+    decoded without byte-level Python loops. NumPy is used when it's available, runs of rows with the same
+    PNG filter type are decoded at once then.
+"""
 import logging
 log = logging.getLogger(__name__)
 
-def _remove_predictors(data, predictor=None, columns=None):
+import sys
+from array import array
+from itertools import accumulate, chain
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# PNG filter types: the first byte of each row
+PNG_NONE, PNG_SUB, PNG_UP, PNG_AVERAGE, PNG_PAETH = range(5)
+
+_low_byte = (0xFF).__and__
+_low_word = (0xFFFF).__and__
+
+# byte value -> its components of 1, 2 or 4 bits
+_UNPACKED = {bpc: [tuple((b >> shift) & ((1 << bpc) - 1) for shift in range(8 - bpc, -1, -bpc)) for b in range(256)]
+             for bpc in (1, 2, 4)}
+
+
+def row_geometry(columns=None, colors=None, bpc=None):
+    """ Predictor row length and bytes per pixel (at least 1) by DecodeParms values
+
+    >>> row_geometry()
+    (1, 1)
+    >>> row_geometry(columns=5, colors=3, bpc=8)
+    (15, 3)
+    >>> row_geometry(columns=10, colors=1, bpc=1)
+    (2, 1)
+    """
+    bits = (colors or 1) * (bpc or 8)
+    return (bits * (columns or 1) + 7) // 8, (bits + 7) // 8
+
+
+def _add_bytes(a, b):
+    """ Bytewise sum modulo 256 of equal length byte strings done on big integers
+
+    >>> _add_bytes(b'\\x01\\xff\\x80', b'\\x02\\x01\\x80')
+    b'\\x03\\x00\\x00'
+    """
+    n = len(a)
+    low, high = int.from_bytes(b'\x7f' * n, 'big'), int.from_bytes(b'\x80' * n, 'big')
+    x, y = int.from_bytes(a, 'big'), int.from_bytes(b, 'big')
+    # sum 7 low bits of each byte, then put the high bit without carrying it to the next byte
+    return (((x & low) + (y & low)) ^ ((x ^ y) & high)).to_bytes(n, 'big')
+
+
+def _unfilter_png_row(ftype, raw, prev, bpp):
+    """ Reverses PNG filter of a single row
+
+    >>> prev = bytes([10, 20, 30, 40])
+    >>> [list(_unfilter_png_row(t, bytes([1, 2, 3, 4]), prev, 2)) for t in range(5)]
+    [[1, 2, 3, 4], [1, 2, 4, 6], [11, 22, 33, 44], [6, 12, 21, 30], [11, 22, 33, 44]]
+    """
+    if ftype == PNG_SUB:
+        out = bytearray(raw)
+        for k in range(bpp):
+            out[k::bpp] = bytes(map(_low_byte, accumulate(raw[k::bpp])))
+        return out
+    if ftype == PNG_UP:
+        return _add_bytes(raw, prev)
+    if ftype == PNG_AVERAGE:
+        out = bytearray(raw)
+        for k in range(bpp):
+            # each pixel component depends on the same component of the left pixel only
+            left, lane = 0, []
+            for x, up in zip(raw[k::bpp], prev[k::bpp]):
+                left = (x + ((left + up) >> 1)) & 0xFF
+                lane.append(left)
+            out[k::bpp] = bytes(lane)
+        return out
+    if ftype == PNG_PAETH:
+        out = bytearray(raw)
+        for k in range(bpp):
+            # a - left, b - upper, c - upper-left; left ones are 0 for the first pixel
+            a = c = 0
+            lane = []
+            for x, b in zip(raw[k::bpp], prev[k::bpp]):
+                pa, pb = b - c, a - c
+                pc = abs(pa + pb)
+                pa, pb = abs(pa), abs(pb)
+                if pa <= pb and pa <= pc:
+                    a = (x + a) & 0xFF
+                elif pb <= pc:
+                    a = (x + b) & 0xFF
+                else:
+                    a = (x + c) & 0xFF
+                lane.append(a)
+                c = b
+            out[k::bpp] = bytes(lane)
+        return out
+    if ftype != PNG_NONE:
+        log.debug("Unknown PNG filter type {}. Row is taken as is.".format(ftype))
+    return raw
+
+
+def _remove_png_predictors(data, rowlen, bpp, prev=None):
+    """ Reverses PNG filters of all rows.
+
+    :param prev: the row preceding data, if data continues a stream
+    :return: decoded data and the last decoded row
+
+    >>> data = bytes([2, 1, 1, 2, 1,  1, 1, 1, 2, 2,  2, 1])
+    >>> _remove_png_predictors(data, 4, 1)
+    (b'\\x01\\x01\\x02\\x01\\x01\\x02\\x04\\x06\\x02', b'\\x01\\x02\\x04\\x06')
+    """
+    row_size = rowlen + 1
+    if prev is None:
+        prev = bytes(rowlen)
+    n_rows = len(data) // row_size
+    if numpy is not None and n_rows:
+        res, prev = _remove_png_predictors_numpy(data, n_rows, rowlen, bpp, prev)
+        res = [res]
+    else:
+        res = []
+        for i in range(0, n_rows * row_size, row_size):
+            prev = _unfilter_png_row(data[i], data[i + 1:i + row_size], prev, bpp)
+            res.append(prev)
+
+    tail = data[n_rows * row_size + 1:]
+    if tail:
+        # incomplete last row
+        row = _unfilter_png_row(data[n_rows * row_size], tail + bytes(rowlen - len(tail)), prev, bpp)
+        res.append(row[:len(tail)])
+    return b''.join(res), bytes(prev)
+
+
+def _remove_png_predictors_numpy(data, n_rows, rowlen, bpp, prev):
+    rows = numpy.frombuffer(data, dtype=numpy.uint8, count=n_rows * (rowlen + 1)).reshape(n_rows, rowlen + 1)
+    types = rows[:, 0]
+    out = rows[:, 1:].copy()
+    prev = numpy.frombuffer(prev, dtype=numpy.uint8)
+    bounds = (numpy.flatnonzero(types[1:] != types[:-1]) + 1).tolist()
+    for start, end in zip([0] + bounds, bounds + [n_rows]):
+        ftype = types[start]
+        block = out[start:end]
+        if ftype == PNG_SUB and rowlen % bpp == 0:
+            # rows don't depend on each other: cumulative sum of each pixel component along rows
+            lanes = block.reshape(end - start, rowlen // bpp, bpp)
+            numpy.cumsum(lanes, axis=1, dtype=numpy.uint8, out=lanes)
+        elif ftype == PNG_UP:
+            numpy.cumsum(block, axis=0, dtype=numpy.uint8, out=block)
+            block += prev
+        elif ftype in (PNG_SUB, PNG_AVERAGE, PNG_PAETH):
+            for i in range(start, end):
+                row = _unfilter_png_row(ftype, out[i].tobytes(), prev.tobytes(), bpp)
+                out[i] = numpy.frombuffer(row, dtype=numpy.uint8)
+                prev = out[i]
+        elif ftype != PNG_NONE:
+            log.debug("Unknown PNG filter type {}. Rows are taken as is.".format(ftype))
+        prev = out[end - 1]
+    return out.tobytes(), prev.tobytes()
+
+
+def _remove_tiff_predictor(data, columns, colors, bpc):
+    """ Reverses TIFF predictor 2: horizontal differencing of pixel components.
+
+    >>> _remove_tiff_predictor(bytes([1, 1, 1, 1, 2, 2]), 3, 1, 8)
+    b'\\x01\\x02\\x03\\x01\\x03\\x05'
+    >>> _remove_tiff_predictor(bytes([0, 1, 255, 255]), 2, 1, 16)
+    b'\\x00\\x01\\x00\\x00'
+    >>> format(_remove_tiff_predictor(bytes([0b00011011]), 3, 1, 2)[0], '08b')
+    '00011111'
+    """
+    if bpc not in (1, 2, 4, 8, 16):
+        raise ValueError("Unsupported BitsPerComponent {} for TIFF predictor".format(bpc))
+    rowlen, _ = row_geometry(columns, colors, bpc)
+    n_rows = len(data) // rowlen
+    res = []
+    if numpy is not None and n_rows and bpc >= 8:
+        dtype = numpy.dtype(numpy.uint8 if bpc == 8 else '>u2')
+        rows = numpy.frombuffer(data, dtype=dtype, count=n_rows * rowlen // dtype.itemsize)
+        lanes = rows.reshape(n_rows, -1, colors).astype(dtype.newbyteorder('='))
+        numpy.cumsum(lanes, axis=1, dtype=lanes.dtype, out=lanes)
+        res.append(lanes.astype(dtype).tobytes())
+    else:
+        for i in range(0, n_rows * rowlen, rowlen):
+            res.append(_unpredict_tiff_row(data[i:i + rowlen], columns, colors, bpc))
+
+    tail = data[n_rows * rowlen:]
+    if tail:
+        res.append(_unpredict_tiff_row(tail + bytes(rowlen - len(tail)), columns, colors, bpc)[:len(tail)])
+    return b''.join(res)
+
+
+def _unpredict_tiff_row(row, columns, colors, bpc):
+    if bpc == 8:
+        return _unfilter_png_row(PNG_SUB, row, None, colors)
+
+    if bpc == 16:
+        words = array('H', row[:len(row) - len(row) % 2])
+        if sys.byteorder == 'little':
+            words.byteswap()
+        for k in range(colors):
+            words[k::colors] = array('H', map(_low_word, accumulate(words[k::colors])))
+        if sys.byteorder == 'little':
+            words.byteswap()
+        return words.tobytes() + row[len(words) * 2:]
+
+    # components of less than a byte: unpacked by a lookup table, padding bits stay intact
+    mask = (1 << bpc) - 1
+    per_byte = 8 // bpc
+    components = list(chain.from_iterable(map(_UNPACKED[bpc].__getitem__, row)))
+    n = columns * colors
+    for k in range(colors):
+        components[k:n:colors] = [c & mask for c in accumulate(components[k:n:colors])]
+    res = [0] * len(row)
+    for k in range(per_byte):
+        shift = 8 - bpc * (k + 1)
+        res = [r | c << shift for r, c in zip(res, components[k::per_byte])]
+    return bytes(res)
+
+
+def _remove_predictors(data, predictor=None, columns=None, colors=None, bpc=None):
     """ Remove LZW/Flate predictors
     1 - No prediction
     2 - TIFF predictor 2
@@ -11,6 +230,16 @@ def _remove_predictors(data, predictor=None, columns=None):
     13 - PNG Average
     14 - PNG Paeth
     15 - PNG Optimum
+
+    PNG predictors are given by the first byte of each row, so any of 10-15 decodes all of them.
+
+    >>> data = bytes([2, 0, 0, 1, 2, 2, 0, 0, 1, 0, 2, 0, 0, 2, 255])
+    >>> _remove_predictors(data, 12, 4)
+    b'\\x00\\x00\\x01\\x02\\x00\\x00\\x02\\x02\\x00\\x00\\x04\\x01'
+    >>> _remove_predictors(bytes([1, 10, 10, 10, 10]), 11, 2, colors=2, bpc=8)
+    b'\\n\\n\\x14\\x14'
+    >>> _remove_predictors(bytes([10, 10, 10, 10]), 2, 2, colors=2, bpc=8)
+    b'\\n\\n\\x14\\x14'
     """
     if predictor is None:
         predictor = 1
@@ -18,16 +247,46 @@ def _remove_predictors(data, predictor=None, columns=None):
     if predictor == 1:
         res = data
     elif predictor == 2:
-        raise ValueError("TIFF prediction not implemented")
+        res = _remove_tiff_predictor(data, columns or 1, colors or 1, bpc or 8)
     elif 10 <= predictor <= 15:
-        row_size = columns + 1
-        res = b''
-        for i in range(0, len(data), row_size):
-            if data[i] + 10 != predictor:
-                log.debug("Unexpected predictor {} in row {}. Expected value {}, columns {}"
-                          .format(data[0] + 10, i, predictor, columns))
-            res += data[i + 1:i + row_size]  # skip leading predictor byte
-
+        res, _ = _remove_png_predictors(data, *row_geometry(columns, colors, bpc))
     else:
         raise ValueError("Unknown predictor type {}".format(predictor))
     return res
+
+
+def _iter_remove_predictors(chunks, predictor=None, columns=None, colors=None, bpc=None):
+    """ Same as :func:`_remove_predictors` for data coming in chunks. Rows are never split between output chunks.
+
+    >>> data = bytes([2, 1, 2, 2, 3, 4, 2, 5, 6])
+    >>> list(_iter_remove_predictors([data[:4], data[4:]], 12, 2))
+    [b'\\x01\\x02', b'\\x04\\x06\\t\\x0c']
+    """
+    if not predictor or predictor == 1:
+        for chunk in chunks:
+            yield chunk
+        return
+
+    # check parameters before any data is decoded
+    _remove_predictors(b'', predictor, columns, colors, bpc)
+    rowlen, bpp = row_geometry(columns, colors, bpc)
+    png = predictor >= 10
+    row_size = rowlen + 1 if png else rowlen
+    prev = None
+    tail = b''
+    for chunk in chunks:
+        data = tail + chunk
+        n = len(data) - len(data) % row_size
+        tail = data[n:]
+        if n:
+            if png:
+                res, prev = _remove_png_predictors(data[:n], rowlen, bpp, prev)
+            else:
+                res = _remove_tiff_predictor(data[:n], columns or 1, colors or 1, bpc or 8)
+            yield res
+    if tail:
+        if png:
+            res, _ = _remove_png_predictors(tail, rowlen, bpp, prev)
+        else:
+            res = _remove_tiff_predictor(tail, columns or 1, colors or 1, bpc or 8)
+        yield res
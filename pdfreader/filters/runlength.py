@@ -19,37 +19,62 @@ def decode(data, *_):
     >>> decode(data)
     b''
     """
-    res = b''
-    buffer = []
-    state = 'need_length'
-    for c in data:
-        if state == 'need_length':
-            if c == 128:
-                state = 'done'
-                break
-            buffer = []
-            length = c
-            if c >= 129:
-                state = 'need_one'
-            else:
-                state = 'need_many'
-        elif state == 'need_one':
-            res += bytes([c] * (257 - length))
-            state = 'need_length'
-        elif state == 'need_many':
-            buffer.append(c)
-            if len(buffer) == length + 1:
-                res += bytes(buffer)
-                buffer = []
-                state = 'need_length'
-
-    if state != 'done':
+    res, _, eod = _decode_runs(data)
+    if not eod:
         log.error("Skipping broken stream")
         res = b''
-
     return res
 
 
+def _decode_runs(data):
+    """ Decodes complete runs until EOD
+
+    :return: decoded data, number of bytes consumed and whether EOD is reached
+
+    >>> _decode_runs(bytes([1, 65, 66, 254, 67, 2, 68]))
+    (b'ABCCC', 5, False)
+    """
+    res = bytearray()
+    i, n = 0, len(data)
+    while i < n:
+        length = data[i]
+        if length == 128:
+            return bytes(res), i + 1, True
+        if length < 128:
+            if i + length + 2 > n:
+                break
+            res += data[i + 1:i + length + 2]
+            i += length + 2
+        else:
+            if i + 2 > n:
+                break
+            res += data[i + 1:i + 2] * (257 - length)
+            i += 2
+    return bytes(res), i, False
+
+
+def iter_decode(chunks, *_):
+    """ Decodes data coming in chunks
+
+    >>> data = bytes([5, 65, 66, 67, 68, 69, 70, 250, 55, 2, 65, 66, 67, 252, 53, 128])
+    >>> list(iter_decode([data[:3], data[3:8], data[8:]]))
+    [b'ABCDEF', b'7777777ABC55555']
+
+    >>> list(iter_decode([bytes([1, 65, 66, 5, 65])]))
+    [b'AB']
+    """
+    tail = b''
+    for chunk in chunks:
+        data = tail + chunk
+        res, i, eod = _decode_runs(data)
+        if res:
+            yield res
+        if eod:
+            return
+        tail = data[i:]
+    log.error("Skipping broken stream: EOD expected")
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
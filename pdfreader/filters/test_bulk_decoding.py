@@ -0,0 +1,62 @@
+""" RunLengthDecode, ASCIIHexDecode and ASCII85Decode on large data.
+    Throughput is measured by benchmarks/filters.py.
+"""
+import unittest
+
+from base64 import a85encode
+from binascii import hexlify
+
+from . import ascii85, asciihex, runlength
+
+#: size of decoded data, bytes
+SIZE = 2**20
+
+
+def sample_data(size=SIZE):
+    """ Mix of literal bytes and zero runs """
+    return ((bytes(range(256)) + bytes(256)) * (size // 512 + 1))[:size]
+
+
+def runlength_encode(data):
+    res = bytearray()
+    for i in range(0, len(data), 128):
+        chunk = data[i:i + 128]
+        if len(chunk) > 1 and not any(chunk):
+            res += bytes((257 - len(chunk), 0))
+        else:
+            res += bytes((len(chunk) - 1,)) + chunk
+    res.append(128)
+    return bytes(res)
+
+
+def asciihex_encode(data):
+    hexed = hexlify(data)
+    # lines of 64 chars as most producers do
+    return b"\n".join(hexed[i:i + 64] for i in range(0, len(hexed), 64)) + b">"
+
+
+def ascii85_encode(data):
+    return a85encode(data, wrapcol=76) + b"~>"
+
+
+#: name, decoder, encoder
+CASES = (("RunLengthDecode", runlength, runlength_encode),
+         ("ASCIIHexDecode", asciihex, asciihex_encode),
+         ("ASCII85Decode", ascii85, ascii85_encode))
+
+
+class TestBulkDecoding(unittest.TestCase):
+
+    def test_decode(self):
+        data = sample_data()
+        for name, module, encode in CASES:
+            with self.subTest(name):
+                self.assertTrue(module.decode(encode(data), {}) == data)
+
+    def test_iter_decode(self):
+        data = sample_data()
+        for name, module, encode in CASES:
+            encoded = encode(data)
+            chunks = [encoded[i:i + 1000] for i in range(0, len(encoded), 1000)]
+            with self.subTest(name):
+                self.assertTrue(b''.join(module.iter_decode(chunks, {})) == data)
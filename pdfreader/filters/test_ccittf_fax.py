@@ -1,6 +1,6 @@
 import unittest
 
-from .ccittfax import CCITTG4Parser
+from .ccittfax import CCITTG4Parser, FaxDecoder, ccittfaxdecode
 
 ##  Test cases
 ##
@@ -142,3 +142,44 @@ class TestCCITTG4Parser(unittest.TestCase):
         parser._do_vertical(1)
         parser._do_vertical(1)
         self.assertEqual(parser._get_bits(), '00000001')
+
+
+class TestFaxDecoder(unittest.TestCase):
+
+    # 16 pixels wide rows with 8 pixels black stripe in the middle, Group 4
+    G4_DATA = bytes([0b00110110, 0b00101111, 0b10000000, 0b00001000, 0b00000000, 0b10000000])
+    STRIPE = b'\xf0\x0f'
+
+    def test_g4(self):
+        self.assertEqual(FaxDecoder(16, k=-1).decode(self.G4_DATA), self.STRIPE * 2)
+
+    def test_g4_rows(self):
+        self.assertEqual(FaxDecoder(16, k=-1, rows=1).decode(self.G4_DATA), self.STRIPE)
+
+    def test_g4_byte_align(self):
+        data = bytes([0b00110110, 0b00101100, 0b11100000])
+        self.assertEqual(FaxDecoder(16, k=-1, byte_align=True).decode(data), self.STRIPE * 2)
+
+    def test_g3_2d(self):
+        # widening stripe: the first row is 1-D coded, the next ones are 2-D coded
+        data = b'\x00\x1d\x8b`\x02N\x007\x0e\xe0'
+        self.assertEqual(FaxDecoder(16, k=2).decode(data), b'\xf0\x0f\xe0\x07\xc0\x03')
+
+    def test_black_is_1(self):
+        self.assertEqual(FaxDecoder(16, k=-1, black_is_1=True).decode(self.G4_DATA), b'\x0f\xf0' * 2)
+
+    def test_row_padding(self):
+        # 12 pixels: black 4, white 8. Padding bits are 0.
+        data = bytes([0b00110101, 0b01110011])
+        self.assertEqual(FaxDecoder(12, k=0).decode(data), b'\x0f\xf0')
+
+    def test_broken(self):
+        # the first row takes 14 bits; the second one lacks its last V0 code and is dropped,
+        # rows decoded before the damage are kept
+        data = self.G4_DATA[:2] + b'\x00\xff\xff'
+        with self.assertLogs('pdfreader.filters.ccittfax', 'WARNING'):
+            self.assertEqual(FaxDecoder(16, k=-1).decode(data), self.STRIPE)
+
+    def test_params(self):
+        params = dict(K=-1, Columns=16, Rows=2, BlackIs1=True)
+        self.assertEqual(ccittfaxdecode(self.G4_DATA, params), b'\x0f\xf0' * 2)
@@ -1,12 +1,15 @@
 import unittest
 import doctest
 
-from . import decoders
+from .. import filters
+from . import decoders, predictors
 
 
 def suite():
     loader = unittest.TestLoader()
     suite = loader.discover('.', 'test_*')
+    suite.addTests(doctest.DocTestSuite(filters))
+    suite.addTests(doctest.DocTestSuite(predictors))
     for m in decoders:
         suite.addTests(doctest.DocTestSuite(m))
     return suite
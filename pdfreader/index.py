@@ -0,0 +1,234 @@
+""" Persistent document index: a sidecar file letting to re-open the same PDF without parsing its structure again.
+
+    It holds PDF header, trailer, merged xref index (including ObjStm membership of compressed objects)
+    and the list of page references. The index is bound to the file by size, modification time
+    and a content hash; it's ignored if any of them doesn't match.
+"""
+import logging
+log = logging.getLogger(__name__)
+
+import base64
+import hashlib
+import json
+import os
+import sys
+import zlib
+
+from array import array
+from decimal import Decimal
+
+from .types import PDFHeader, PDFTrailer, IndirectReference, HexString, Name, String, Page
+from .types.xref import XRefIndex
+
+#: index file format version. Files of other versions are ignored.
+INDEX_VERSION = 1
+
+#: number of leading and trailing file bytes being hashed
+HASH_SIZE = 65536
+
+
+def fingerprint(buffer):
+    """ Identifies file content behind the buffer: size, modification time and SHA-256 of its head and tail.
+        Incremental updates are appended to the end, so the tail catches them.
+        Modification time is None for in-memory data.
+
+    >>> from pdfreader.buffer import Buffer
+    >>> fp = fingerprint(Buffer(b'%PDF-1.4 ... %%EOF', 0))
+    >>> fp['size'], fp['mtime'], len(fp['hash'])
+    (18, None, 64)
+    """
+    mark = buffer.mark()
+    buffer.reset(-1)
+    size = buffer.position + 1
+    h = hashlib.sha256()
+    buffer.rewind(0)
+    h.update(buffer.read_view(min(size, HASH_SIZE)))
+    if size > HASH_SIZE:
+        buffer.rewind(max(size - HASH_SIZE, HASH_SIZE))
+        h.update(buffer.read_view(size - buffer.position))
+    buffer.rewind(mark)
+
+    mtime = None
+    try:
+        mtime = os.fstat(buffer.fileobj.fileno()).st_mtime_ns
+    except (AttributeError, OSError, ValueError):
+        # in-memory data
+        pass
+    return dict(size=size, mtime=mtime, hash=h.hexdigest())
+
+
+def encode_object(obj):
+    """ Converts PDF object to JSON-compatible data
+
+    >>> encode_object({'Root': IndirectReference(1, 0), 'ID': [HexString('AB'), b'x'], 'Type': Name('Pages')})
+    {'D': {'Root': {'R': [1, 0]}, 'ID': [{'H': 'AB'}, {'S': 'eA=='}], 'Type': {'N': 'Pages'}}}
+    """
+    if obj is None or isinstance(obj, (bool, int)):
+        return obj
+    if isinstance(obj, (Decimal, float)):
+        return {'F': str(obj)}
+    if isinstance(obj, IndirectReference):
+        return {'R': [obj.num, obj.gen]}
+    if isinstance(obj, HexString):
+        return {'H': str(obj)}
+    if isinstance(obj, Name):
+        return {'N': str(obj)}
+    if isinstance(obj, bytes):
+        return {'S': base64.b64encode(obj).decode()}
+    if isinstance(obj, list):
+        return [encode_object(o) for o in obj]
+    if isinstance(obj, dict):
+        return {'D': {k: encode_object(v) for k, v in obj.items()}}
+    raise TypeError("Can't save {!r} to the document index".format(obj))
+
+
+def decode_object(data, real_type=Decimal):
+    """ Restores PDF object encoded with :func:`encode_object`
+
+    >>> decode_object({'D': {'Root': {'R': [1, 0]}, 'ID': [{'H': 'AB'}, {'S': 'eA=='}], 'Scale': {'F': '0.5'}}})
+    {'Root': <IndirectReference:n=1,g=0>, 'ID': ['AB', b'x'], 'Scale': Decimal('0.5')}
+    """
+    if isinstance(data, list):
+        return [decode_object(d, real_type) for d in data]
+    if not isinstance(data, dict):
+        return data
+    (tag, val), = data.items()
+    if tag == 'D':
+        return {Name(k): decode_object(v, real_type) for k, v in val.items()}
+    if tag == 'R':
+        return IndirectReference(*val)
+    if tag == 'F':
+        return real_type(val)
+    if tag == 'H':
+        return HexString(val)
+    if tag == 'N':
+        return Name(val)
+    return String(base64.b64decode(val))
+
+
+def encode_array(arr):
+    """ Compressed little-endian array data as text """
+    if sys.byteorder == 'big':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return base64.b64encode(zlib.compress(arr.tobytes())).decode()
+
+
+def decode_array(typecode, data):
+    arr = array(typecode, zlib.decompress(base64.b64decode(data)))
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+
+def page_refs(doc):
+    """ References of all document pages in the order of :meth:`~pdfreader.document.PDFDocument.pages`.
+
+        :return: list of :class:`~pdfreader.types.native.IndirectReference` or None
+                 if some page tree nodes are direct objects or the tree has cycles
+
+    >>> from pdfreader import PDFDocument
+    >>> body = (b'%PDF-1.4\\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\\n'
+    ...         b'2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\\n'
+    ...         b'3 0 obj << /Type /Pages /Parent 2 0 R /Kids [2 0 R] /Count 1 >> endobj\\n')
+    >>> offsets = [body.index(b'%d 0 obj' % n) for n in (1, 2, 3)]
+    >>> xref = b'xref\\n0 4\\n0000000000 65535 f \\n' + b''.join(b'%010d 00000 n \\n' % o for o in offsets)
+    >>> trailer = b'trailer << /Size 4 /Root 1 0 R >>\\nstartxref\\n%d\\n%%%%EOF\\n' % len(body)
+    >>> page_refs(PDFDocument(body + xref + trailer)) is None
+    True
+    """
+    refs = []
+    visited = set()
+
+    def walk(node):
+        kids = dict.get(node, 'Kids')
+        if isinstance(kids, IndirectReference):
+            kids = doc.locate_object(kids.num, kids.gen)
+        for ref in kids:
+            if not isinstance(ref, IndirectReference):
+                return False
+            child = doc.obj_by_ref(ref)
+            if isinstance(child, Page):
+                refs.append(ref)
+                continue
+            if (ref.num, ref.gen) in visited:
+                log.warning("Page tree cycle at {} {} R".format(ref.num, ref.gen))
+                return False
+            visited.add((ref.num, ref.gen))
+            if not walk(child):
+                return False
+        return True
+
+    return refs if walk(doc.root.Pages) else None
+
+
+class DocumentIndex(object):
+    """ Document structure saved for fast re-open
+
+    :param fingerprint: file identity, see :func:`fingerprint`
+    :param header: :class:`~pdfreader.types.filestructure.PDFHeader`
+    :param trailer: :class:`~pdfreader.types.filestructure.PDFTrailer`
+    :param pages: page references or None if unknown
+    """
+
+    def __init__(self, fingerprint, header, trailer, pages=None):
+        self.fingerprint = fingerprint
+        self.header = header
+        self.trailer = trailer
+        self.pages = pages
+
+    @classmethod
+    def from_document(cls, doc):
+        """ Builds index of an open :class:`~pdfreader.document.PDFDocument` """
+        return cls(fingerprint(doc.parser.buffer), doc.header, doc.trailer, page_refs(doc))
+
+    def matches(self, buffer):
+        """ Checks if the index belongs to the file behind the buffer """
+        return self.fingerprint == fingerprint(buffer)
+
+    def save(self, path):
+        """ Writes the index file. The file is replaced atomically, so concurrent readers never see partial data. """
+        xref_index = self.trailer.xref_index
+        data = dict(version=INDEX_VERSION,
+                    fingerprint=self.fingerprint,
+                    header=dict(version=self.header.version, offset=self.header.offset),
+                    trailer=encode_object(self.trailer.params),
+                    xref=dict(types=encode_array(array('B', xref_index.types)),
+                              col2=encode_array(xref_index.col2),
+                              col3=encode_array(xref_index.col3),
+                              sparse=[[n] + list(entry) for n, entry in xref_index.sparse.items()]),
+                    pages=None if self.pages is None else [[ref.num, ref.gen] for ref in self.pages])
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, real_type=Decimal):
+        """ Reads the index file.
+
+        :return: :class:`DocumentIndex` or None if the file is missing, corrupted or has another version
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                log.debug("Document index {} version mismatch".format(path))
+                return None
+            xref = data["xref"]
+            xref_index = XRefIndex.from_columns(decode_array('B', xref["types"]),
+                                                decode_array('Q', xref["col2"]),
+                                                decode_array('Q', xref["col3"]),
+                                                {n: (t, c2, c3) for n, t, c2, c3 in xref["sparse"]})
+            params = decode_object(data["trailer"], real_type)
+            trailer = PDFTrailer([], xref_index=xref_index, **params)
+            header = PDFHeader(data["header"]["version"], data["header"]["offset"])
+            pages = data["pages"]
+            if pages is not None:
+                pages = [IndirectReference(num, gen) for num, gen in pages]
+            return cls(data["fingerprint"], header, trailer, pages)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, KeyError, AttributeError, AssertionError, zlib.error):
+            log.warning("Can't read document index {}".format(path))
+            return None
@@ -1,19 +1,33 @@
-from ..buffer import Buffer
+import os
+
+from ..buffer import Buffer, MMapBuffer
 from ..constants import WHITESPACES, EOL, DELIMITERS, CR, LF, STRING_ESCAPED, DEFAULT_ENCODING
 from ..types import *
 from ..exceptions import ParserException
+from . import lexer
+
+
+#: streams of this size and bigger keep their data in the file until it's accessed
+LAZY_STREAM_SIZE = 4096
 
 
 class BasicTypesParser(object):
-    """ can parse basic PDF types  """
+    """ can parse basic PDF types
+
+    :param real_type: type of real numbers: :class:`~decimal.Decimal` (default, exact) or float (faster)
+    """
 
     exception_class = ParserException
     indirect_references_allowed = True
     empty_names_allowed = True
 
-    def __init__(self, fileobj_or_buffer, offset=0):
+    def __init__(self, fileobj_or_buffer, offset=0, real_type=Decimal):
+        self.real_type = real_type
         if isinstance(fileobj_or_buffer, Buffer):
             self.buffer = fileobj_or_buffer
+        elif isinstance(fileobj_or_buffer, (str, os.PathLike)):
+            # file path: map the whole file into memory
+            self.buffer = MMapBuffer(fileobj_or_buffer, offset)
         else:
             self.buffer = Buffer(fileobj_or_buffer, offset)
 
@@ -37,6 +51,12 @@ class BasicTypesParser(object):
     def read_backward(self, n):
         return self.buffer.read_backward(n)
 
+    def mark(self):
+        return self.buffer.mark()
+
+    def rewind(self, mark):
+        return self.buffer.rewind(mark)
+
     def get_state(self):
         return self.buffer.get_state()
 
@@ -56,19 +76,15 @@ class BasicTypesParser(object):
         self.maybe_spaces()
 
     def maybe_spaces(self):
-        while self.is_whitespace:
-            self.next()
+        self.buffer.match(lexer.SPACES)
 
     def maybe_spaces_or_comments(self):
-        self.maybe_spaces()
-        comments = []
         res = ''
-        while self.current == b'%':
-            comments.append(self.comment())
-            self.maybe_spaces()
-        if comments:
+        text = self.buffer.match(lexer.SPACES_OR_COMMENTS).group()
+        if b'%' in text:
             # return multiline comment
-            res = Comment("\n".join(comments))
+            comments = lexer.COMMENT.findall(text)
+            res = Comment("\n".join(c.decode(DEFAULT_ENCODING) for c in comments))
         return res
 
     def eol(self):
@@ -180,13 +196,12 @@ class BasicTypesParser(object):
         >>> BasicTypesParser(s, 0).comment()
         '%'
         """
-        if self.current != b"%":
+        m = self.buffer.match(lexer.COMMENT)
+        if m is None:
             self.on_parser_error("% expected")
-        line = b""
-        while not self.is_eol:
-            line += self.next()
-        self.eol()
-        return Comment(line.decode(DEFAULT_ENCODING))
+        if not self.is_eof:
+            self.eol()
+        return Comment(m.group().decode(DEFAULT_ENCODING))
 
     def numeric(self):
         """
@@ -227,44 +242,26 @@ class BasicTypesParser(object):
         >>> BasicTypesParser(s, 0).numeric()
         Decimal('-0.01')
 
-        """
-        is_negative = False
-        is_integer = True
-        if self.current == b"+":
-            self.next()
-        elif self.current == b"-":
-            is_negative = True
-            self.next()
-        ipart, fpart = b'', b''
-
-        # read integer part
-        while self.is_digit:
-            ipart += self.current
-            self.next()
-
-        # read point if exists
-        if self.current == b'.':
-            is_integer = False
-            self.next()
-            while self.is_digit:
-                fpart += self.next()
+        >>> s = b'-3.5'
+        >>> BasicTypesParser(s, 0, real_type=float).numeric()
+        -3.5
 
+        """
+        m = self.buffer.match(lexer.NUMERIC)
+        sign, ipart, point, fpart = m.groups()
         if not ipart and not fpart:
             self.on_parser_error("Invalid numeric token")
 
-        if not ipart:
-            ipart = b'0'
-        if not fpart:
-            fpart = b'0'
-
-        if is_integer:
-            val = int(ipart.decode(DEFAULT_ENCODING))
+        if not point:
+            val = int(m.group())
+        elif self.real_type is not Decimal:
+            # adding 0 keeps negated zero positive like Decimal does
+            val = self.real_type(m.group()) + 0
         else:
-            val = Decimal("{}.{}".format(ipart.decode(DEFAULT_ENCODING), fpart.decode(DEFAULT_ENCODING)))
-
-        if is_negative:
-            val = -val
-
+            val = Decimal("{}.{}".format(ipart.decode(DEFAULT_ENCODING) or '0', fpart.decode(DEFAULT_ENCODING) or '0'))
+            if sign == b'-':
+                # negated zero stays positive
+                val = -val
         return val
 
     def non_negative_int(self):
@@ -305,26 +302,11 @@ class BasicTypesParser(object):
         ...
         pdfreader.exceptions.ParserException: Name token expected
         """
-        if self.current != b'/':
+        m = self.buffer.match(lexer.NAME)
+        if m is None:
             self.on_parser_error("Name token expected")
-        token = b''
-        self.next()
-        while self.is_regular:
-            if self.current == b'#':
-                self.next()
-                code = b''
-                for i in range(2):
-                    if not self.is_hex_digit:
-                        break
-                    code += self.next()
-                if len(code) == 2:
-                    # must be exactly 2 characters
-                    token += chr(int(code.decode(DEFAULT_ENCODING), 16)).encode(DEFAULT_ENCODING)
-                else:
-                    # leave as is
-                    token += b'#' + code
-            else:
-                token += self.next()
+        # #XX codes must be exactly 2 characters, otherwise they are left as is
+        token = lexer.unescape_name(m.group(1))
         if not self.empty_names_allowed and not token:
             self.on_parser_error("Empty /Name found")
 
@@ -440,6 +422,14 @@ class BasicTypesParser(object):
         >>> s = b'''stream\\n***data***\\nendstream\\n\\n\\n\\n\\n'''
         >>> BasicTypesParser(s, 0)._stream(d).stream
         b'***data***'
+
+        Big stream data is read on the first access
+
+        >>> d = dict(Length=LAZY_STREAM_SIZE)
+        >>> s = b'stream\\n' + b'*' * LAZY_STREAM_SIZE + b'\\nendstream'
+        >>> stream = BasicTypesParser(s, 0)._stream(d)
+        >>> isinstance(stream._stream, StreamPayload), len(stream), stream.stream == b'*' * LAZY_STREAM_SIZE
+        (True, 4096, True)
         """
         length = d['Length']
         token = self.read(6)
@@ -453,9 +443,14 @@ class BasicTypesParser(object):
             logging.debug("Missing LF after `stream` token - [CR]LF expected. Trying to proceed.")
             self.prev()
 
-        state = self.get_state()
+        mark = self.mark()
 
-        data = self.read(length)
+        if isinstance(length, int) and length >= LAZY_STREAM_SIZE:
+            # leave big data in the file until it's accessed
+            data = StreamPayload(self.buffer, mark, length)
+            self.rewind(mark + length)
+        else:
+            data = self.read(length)
         # According to the spec EOL should be after the data and before endstream
         # But some files do not follow this.
         #
@@ -466,20 +461,15 @@ class BasicTypesParser(object):
         token = self.read(9)
         if token != b'endstream':
             # Work around wrong length. See https://github.com/maxpmaxp/pdfreader/issues/68
-            err_state = self.get_state()
             logging.debug("Wrong stream length: {}. Trying to work around the issue.".format(length))
-            self.set_state(state)
-            data = self.read(9)
-            while not data.endswith(b'endstream'):
-                ch = self.next()
-                if ch is None:
-                    self.set_state(err_state)
-                    self.on_parser_error("endstream expected")
-                data += ch
-
-            data = data[:-9]
-            while data and data[-1:] in EOL:
-                data = data[:-1]
+            err_mark = self.mark()
+            self.rewind(mark)
+            end = self.buffer.find(b'endstream')
+            if end < 0:
+                self.rewind(err_mark)
+                self.on_parser_error("endstream expected")
+            data = bytes(self.buffer.read_view(end - mark)).rstrip(CR + LF)
+            self.read(9)
 
         return Stream(d, data)
 
@@ -511,16 +501,21 @@ class BasicTypesParser(object):
         """
         if self.current != b"<":
             self.on_parser_error("Hexadecimal string expected")
-        self.next()
-        token = b''
-        self.maybe_spaces_or_comments()
-        while self.is_hex_digit:
-            token += self.next()
+        m = self.buffer.match(lexer.HEXSTRING)
+        if m is not None:
+            token = m.group(1).translate(None, lexer.WHITESPACE_CHARS)
+        else:
+            # may contain comments
+            self.next()
+            token = b''
             self.maybe_spaces_or_comments()
+            while self.is_hex_digit:
+                token += self.next()
+                self.maybe_spaces_or_comments()
 
-        ch = self.next()
-        if ch != b'>':
-            self.on_parser_error("Wrong hexadecimal string")
+            ch = self.next()
+            if ch != b'>':
+                self.on_parser_error("Wrong hexadecimal string")
         if len(token) % 2:
             # if there is an odd number of digits - the last one should be assumed 0
             token += b'0'
@@ -599,11 +594,18 @@ class BasicTypesParser(object):
             self.on_parser_error("String expected")
         val = b''
         self.next()
+        depth = 0  # balanced parenthesis level
         while True:
+            val += self.buffer.match(lexer.STRING_CHUNK).group()
             ch = self.next()
             if ch == b'(':
-                self.prev()
-                val += b"(" + self.string() + b")"
+                depth += 1
+                val += ch
+            elif ch == b')':
+                if not depth:
+                    break
+                depth -= 1
+                val += ch
             elif ch == b'\\':
                 ch = self.next()
                 if ch in b"01234567":
@@ -627,35 +629,36 @@ class BasicTypesParser(object):
                 else:
                     # unescape or leave as is
                     val += STRING_ESCAPED.get(ch) or (b"\\" + ch)
-            elif ch == b')':
-                break
             else:
-                val += ch
+                self.on_parser_error("Unterminated string")
         return String(val)
 
     def _get_parser(self):
         method = None
-        if self.current == b'<':
+        ch = self.current
+        if ch is None:
+            pass
+        elif ch in b'1234567890':
+            if self.indirect_references_allowed:
+                method = self.numeric_or_indirect_reference
+            else:
+                method = self.numeric
+        elif ch == b"/":
+            method = self.name
+        elif ch == b'<':
             method = self.dictionary_or_stream_or_hexstring
-        elif self.current == b'[':
+        elif ch == b'[':
             method = self.array
-        elif self.current == b'(':
+        elif ch == b'(':
             method = self.string
-        elif self.current == b'n':
+        elif ch in b'+-.':
+            method = self.numeric
+        elif ch == b'n':
             method = self.null
-        elif self.current == b'f':
+        elif ch == b'f':
             method = self.false
-        elif self.current == b't':
+        elif ch == b't':
             method = self.true
-        elif self.current in b'+-.':
-            method = self.numeric
-        elif self.current in b'1234567890':
-            if self.indirect_references_allowed:
-                method = self.numeric_or_indirect_reference
-            else:
-                method = self.numeric
-        elif self.current == b"/":
-            method = self.name
         return method
 
     def object(self):
@@ -685,13 +688,36 @@ class BasicTypesParser(object):
         return IndirectReference(num, gen)
 
     def numeric_or_indirect_reference(self):
-        state = self.get_state()
-        try:
-            val = self.indirect_reference()
-        except ParserException:
-            self.set_state(state)
-            val = self.numeric()
-        return val
+        """ Recognizes indirect reference by bounded lookahead, no backtracking on failures
+
+        >>> s = b'10 5 R'
+        >>> BasicTypesParser(s, 0).numeric_or_indirect_reference()
+        <IndirectReference:n=10,g=5>
+
+        >>> s = b'10 5 0 R'
+        >>> p = BasicTypesParser(s, 0)
+        >>> p.numeric_or_indirect_reference(), p.current
+        (10, b' ')
+
+        >>> s = b'10.0 5 R'
+        >>> BasicTypesParser(s, 0).numeric_or_indirect_reference()
+        Decimal('10.0')
+
+        Long whitespace runs after a plain number take linear time
+
+        >>> s = b'5' + b' ' * 100000 + b'/Type'
+        >>> p = BasicTypesParser(s, 0)
+        >>> p.numeric_or_indirect_reference(), p.current
+        (5, b' ')
+        >>> s = b'5 % comment %% 0 R\\n' * 1000 + b'/Type'
+        >>> p = BasicTypesParser(s, 0)
+        >>> p.numeric_or_indirect_reference(), p.current
+        (5, b' ')
+        """
+        m = self.buffer.match(lexer.INDIRECT_REFERENCE)
+        if m is not None:
+            return IndirectReference(int(m.group(1)), int(m.group(2)))
+        return self.numeric()
 
     def token(self):
         """ just a token which does not belong to any of PDF types like: def, findresource, ET, BT
@@ -709,13 +735,10 @@ class BasicTypesParser(object):
             ...
             pdfreader.exceptions.ParserException: Regular non-digit character expected
         """
-        if not self.is_regular or self.is_digit:
+        m = self.buffer.match(lexer.TOKEN)
+        if m is None or m.group()[0] in b'0123456789':
             self.on_parser_error("Regular non-digit character expected")
-
-        token = b''
-        while self.is_regular:
-            token += self.next()
-        return Token(token.decode(DEFAULT_ENCODING))
+        return Token(m.group().decode(DEFAULT_ENCODING))
 
     def expected_name(self, value):
         name = self.name()
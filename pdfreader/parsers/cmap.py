@@ -18,12 +18,12 @@ class CMapParser(BasicTypesParser):
     indirect_references_allowed = False
 
     def object_or_token(self):
-        state = self.get_state()
+        mark = self.mark()
 
         try:
             obj = super(CMapParser, self).object()
         except ParserException:
-            self.set_state(state)
+            self.rewind(mark)
             obj = self.token()
         return obj
 
@@ -34,8 +34,7 @@ class CMapParser(BasicTypesParser):
                 break
             obj = self.object_or_token()
             if isinstance(obj, Name) and obj == name:
-                for _ in range(len(name) + 1): # as name contains leading /
-                    self.prev()
+                self.read_backward(len(name) + 1) # as name contains leading /
                 return True
         return False
 
@@ -49,8 +48,7 @@ class CMapParser(BasicTypesParser):
                 break
             obj = self.object_or_token()
             if isinstance(obj, Token) and obj == name:
-                for _ in range(len(name)):
-                    self.prev()
+                self.read_backward(len(name))
                 return True
         return False
 
@@ -160,7 +158,7 @@ class CMapParser(BasicTypesParser):
         # begincmap
         self.expected_token('begincmap')
         self.maybe_spaces_or_comments()
-        state = self.get_state() # save parser state
+        mark = self.mark() # save parser state
 
         try:
             cmapname = self.cmap_name()
@@ -168,38 +166,38 @@ class CMapParser(BasicTypesParser):
             # see cmap-sample-4.txt (page 9 samples/tyler-or-inline-image.pdf) - missing /CMapName
             log.debug("Missing /CMapName")
             cmapname = None
-            self.set_state(state)
+            self.rewind(mark)
 
         # Extarct Coderanges
-        self.set_state(state)
+        self.rewind(mark)
         codespaceranges = CodespaceRanges()
         while self.skip_until_token("begincodespacerange"):
             codespaceranges.merge(self.codespacerange())
 
         # Extarct CID mappings: range & chars
-        self.set_state(state)
+        self.rewind(mark)
         cidranges = MappedCodespaceRanges()
         while self.skip_until_token("begincidrange"):
             cidranges.merge(self.mapped_codespacerange("cid"))
-        self.set_state(state)
+        self.rewind(mark)
         while self.skip_until_token("begincidchar"):
             cidranges.merge(self.mapped_char("cid"))
 
         # Extracts NotDef mappings: range & chars
-        self.set_state(state)
+        self.rewind(mark)
         notdefranges = MappedCodespaceRanges()
         while self.skip_until_token("beginnotdefrange"):
             notdefranges.merge(self.mapped_codespacerange("notdef"))
-        self.set_state(state)
+        self.rewind(mark)
         while self.skip_until_token("beginnotdefchar"):
             notdefranges.merge(self.mapped_char("notdef"))
 
         # Extracts BF mappings: range & chars
-        self.set_state(state)
+        self.rewind(mark)
         bfranges = MappedCodespaceRanges()
         while self.skip_until_token("beginbfrange"):
             bfranges.merge(self.mapped_codespacerange("bf"))
-        self.set_state(state)
+        self.rewind(mark)
         while self.skip_until_token("beginbfchar"):
             bfranges.merge(self.mapped_char("bf"))
 
@@ -66,23 +66,23 @@ class ContentParser(BasicTypesParser):
         return val
 
     def _get_parser(self):
-        if self.current in b'nft':
+        if self.current in (b'n', b'f', b't'):
             # work around tokens which starts the same as null, false, true
             method = self.null_false_true_token
         else:
             method = super(ContentParser, self)._get_parser()
         if method is None:
             # assume token
-            method = self.token
-            # parse known content objects as objects rather than just tokens
-            val = method()
-            for i in range(len(val)):
-                self.prev()
+            val = self.token()
             if val == 'BI':
+                # parse known content objects as objects rather than just tokens
+                self.read_backward(len(val))
                 method = self.bi_ei
+            else:
+                method = lambda: val
         return method
 
     def bi_ei(self):
         """ returns InlineImage """
-        p = InlineImageParser(self.buffer)
+        p = InlineImageParser(self.buffer, real_type=self.real_type)
         return p.inline_image()
@@ -1,11 +1,19 @@
 import logging
 import re
 
+from array import array
+
 from ..constants import WHITESPACE_CODES, EOL, SP
 from ..exceptions import ParserException
 from ..types import *
+from ..utils import cached_property
 
 from .base import BasicTypesParser
+from . import lexer
+
+
+#: number of xref entries parsed at once
+XREF_CHUNK = 65536
 
 
 class BruteForceRecursion(Exception):
@@ -13,8 +21,8 @@ class BruteForceRecursion(Exception):
 
 
 class PDFParser(BasicTypesParser):
-    PDF_HEADER = re.compile(b"^%PDF-(\d\.\d)", re.MULTILINE)
-    IPS_HEADER = re.compile(b"^%IPS-Adobe-\d\.\d PDF-(\d\.\d)", re.MULTILINE)
+    #: either %PDF-M.m or %IPS-Adobe-N.n PDF-M.m at the beginning of a line
+    PDF_HEADER = re.compile(br"(?m)^%(?:IPS-Adobe-\d\.\d )?PDF-(\d\.\d)")
 
     @staticmethod
     def is_empty_line(bline):
@@ -59,6 +67,9 @@ class PDFParser(BasicTypesParser):
         <IndirectObject:n=12,g=0,v=<Stream:len=10,data=b'***data***'>>
         >>> p.indirect_object()
         <IndirectObject:n=13,g=0,v=None>
+
+        >>> PDFParser(b'5 0 obj 1.5 endobj', 0, real_type=float).indirect_object()
+        <IndirectObject:n=5,g=0,v=1.5>
         """
         num = self.non_negative_int()
         self.maybe_spaces_or_comments()
@@ -79,7 +90,7 @@ class PDFParser(BasicTypesParser):
                 # See https://github.com/maxpmaxp/pdfreader/issues/64
                 # Allow indirect stream objects without endobj
                 # TODO: Should we allow this for other objects?
-                for _ in range(6): self.prev()
+                self.read_backward(6)
             else:
                 self.on_parser_error("endobj expected")
 
@@ -123,6 +134,12 @@ class PDFParser(BasicTypesParser):
         >>> PDFParser(f).pdf_header()
         <PDF Header:v=1.6 (major=1, minor=6), offset=21)>
 
+        Header must start a line
+
+        >>> f = b'%junk %PDF-1.4\\n%PDF-1.6\\nblablabla'
+        >>> PDFParser(f).pdf_header()
+        <PDF Header:v=1.6 (major=1, minor=6), offset=15)>
+
         Test missing header and one out of 1024 leading bytes
 
         >>> f = b' '*1020 + b'\\n%PDF-1.5\\nblablabla'
@@ -139,25 +156,15 @@ class PDFParser(BasicTypesParser):
         pdfreader.exceptions.ParserException: No PDF header found
 
         """
-        self.reset(0)
-        size = len("%IPS-Adobe-1.3 PDF-1.6") # max header size
-
-        window = self.read(size)
-        n_read = size
-        m = self.PDF_HEADER.search(window) or self.IPS_HEADER.search(window)
-        while m is None and n_read < 1024 and not self.is_eof:
-            window = window[1:] + self.next()
-            n_read += 1
-            m = self.PDF_HEADER.search(window) or self.IPS_HEADER.search(window)
-            
+        self.rewind(0)
+        m = self.PDF_HEADER.search(self.read(1024))
         if m is None:
             self.on_parser_error("No PDF header found")
 
         # return current to the beginning of the header
-        for _ in range(size):
-            self.prev()
+        self.rewind(m.start())
 
-        return PDFHeader(m.groups()[0].decode(DEFAULT_ENCODING), offset=self.buffer.index + m.start())
+        return PDFHeader(m.group(1).decode(DEFAULT_ENCODING), offset=m.start())
 
     def pdf_trailer(self):
         """
@@ -267,9 +274,7 @@ class PDFParser(BasicTypesParser):
         while self.current in b'0123456789':
             first_object, n_entries = self.xref_range()
             self.eol()
-            for i in range(n_entries):
-                offset, gen, flag = self.xref_entry()
-                xref.add_entry(XRefEntry(number=first_object + i, offset=offset, generation=gen, typ=flag))
+            xref.add_direct_subsection(first_object, *self.xref_subsection(n_entries))
         return xref
 
     def body_element(self):
@@ -307,8 +312,45 @@ class PDFParser(BasicTypesParser):
 
         return d1, d2
 
+    def xref_subsection(self, n_entries):
+        """ Reads n 20-bytes xref entries at once.
+
+            :return: offsets array, generations array and flags bytes
+
+            >>> s = b'0000000000 65535 f\\r\\n0000000016 00000 n\\r\\n0000000241 00001 n\\r\\ntrailer'
+            >>> PDFParser(s, 0).xref_subsection(3)
+            (array('q', [0, 16, 241]), array('H', [65535, 0, 1]), b'fnn')
+        """
+        offsets, gens, flags = array('q'), array('H'), bytearray()
+        for n in [XREF_CHUNK] * (n_entries // XREF_CHUNK) + [n_entries % XREF_CHUNK]:
+            mark = self.mark()
+            tokens = self.read(20 * n).split()
+            chunk_flags = b''.join(tokens[2::3])
+            if len(tokens) == 3 * n and len(chunk_flags) == n and not chunk_flags.translate(None, b'nf'):
+                try:
+                    chunk_offsets = array('q', map(int, tokens[0::3]))
+                    chunk_gens = array(gens.typecode, map(int, tokens[1::3]))
+                    offsets.extend(chunk_offsets)
+                    gens.extend(chunk_gens)
+                    flags += chunk_flags
+                    continue
+                except (ValueError, OverflowError):
+                    pass
+
+            # irregular entries: go one by one
+            self.rewind(mark)
+            if gens.typecode == 'H':
+                # generations may be out of range
+                gens = array('l', gens)
+            for _ in range(n):
+                offset, gen, flag = self.xref_entry()
+                offsets.append(offset)
+                gens.append(gen)
+                flags += flag.encode()
+        return offsets, gens, bytes(flags)
+
     def xref_entry(self):
-        data = b"".join([self.next() for _ in range(20)]).strip()
+        data = self.read(20).strip()
         offset, gen, flag = data.split(b" ", 2)
         try:
             offset, gen = int(offset), int(gen)
@@ -349,20 +391,13 @@ class PDFParser(BasicTypesParser):
             ...
             pdfreader.exceptions.ParserException: %%EOF not found
         """
+        # one read of the file tail
         self.reset(-1024)
-        window = b''
-        for _ in range(5):
-            window = self.prev() + window
-
-        n_read = len(window)
-
-        while n_read < 1024 and not self.is_eof:
-            if window == b"%%EOF":
-                break
-            window = self.prev() + window[:-1]
-            n_read += 1
-        else:
+        pos = self.buffer.rfind(b"%%EOF", 1023)
+        if pos < 0:
             self.on_parser_error("%%EOF not found")
+        # stay right before %%EOF
+        self.rewind(pos - 1)
         return True
 
     def xref_offset(self):
@@ -390,21 +425,11 @@ class PDFParser(BasicTypesParser):
         """
         self.seek_eof()
         token = b'startxref'
-        window = b''
-        for _ in range(len(token)):
-            window = self.prev() + window
-
-        n_read = len(window)
-
-        while not self.is_eof:
-            if window == token:
-                break
-            window = self.prev() + window[:-1]
-            n_read += 1
-        else:
+        pos = self.buffer.rfind(token)
+        if pos < 0:
             self.on_parser_error("startxref not found")
 
-        self.read(len(token) + 1)
+        self.rewind(pos + len(token))
         self.maybe_spaces_or_comments()
         offset = self.non_negative_int()
         return offset
@@ -412,12 +437,20 @@ class PDFParser(BasicTypesParser):
 
 class RegistryPDFParser(PDFParser):
 
-    def __init__(self, fileobj, registry, security_handler=None):
-        super(RegistryPDFParser, self).__init__(fileobj)
+    def __init__(self, fileobj, registry, security_handler=None, real_type=Decimal, index=None,
+                 max_decoded_size=None):
+        super(RegistryPDFParser, self).__init__(fileobj, real_type=real_type)
         self.registry = registry
         self.security_handler = security_handler
-        self.header = self.pdf_header()
-        self.trailer = self.pdf_trailer()
+        # decoded data size limit for all streams
+        self.max_decoded_size = max_decoded_size
+        # saved document index is used only if it was built for the very same file
+        self.index = index if index is not None and index.matches(self.buffer) else None
+        if self.index:
+            self.header, self.trailer = self.index.header, self.index.trailer
+        else:
+            self.header = self.pdf_header()
+            self.trailer = self.pdf_trailer()
         self.reset(self.header.offset)
         self.brute_force_state = self.get_state()
         self.brute_force_lookup_stack = []
@@ -438,8 +471,8 @@ class RegistryPDFParser(PDFParser):
         else:
             raise ValueError("Security handler already set")
 
-    def on_parsed_indirect_object(self, obj):
-        self.registry.register(obj)
+    def on_parsed_indirect_object(self, obj, b_offset=None, e_offset=None):
+        self.registry.register(obj, b_offset, e_offset)
 
     def decrypt_indirect_object_if_necessary(self, obj):
         if self.security_handler and isinstance(obj.val, (String, Stream, HexString)):
@@ -448,13 +481,62 @@ class RegistryPDFParser(PDFParser):
             res = obj
         return res
 
+    @cached_property
+    def objects_offsets(self):
+        """ Repair mode index built with one pass over the whole file: (num, gen) -> offset of `num gen obj`.
+            The last header wins as incremental updates come after original objects.
+        """
+        offsets = {}
+        for offset, m in self.buffer.finditer(lexer.OBJECT_HEADER):
+            offsets[int(m.group(1)), int(m.group(2))] = offset
+        logging.debug("{} indirect objects found on file scan".format(len(offsets)))
+        return offsets
+
+    def locate_object_by_offsets_index(self, num, gen):
+        """ Locate by the file scan index when xref is missing or wrong """
+        offset = self.objects_offsets.get((num, gen))
+        if offset is not None:
+            try:
+                self.reset(offset)
+                self.indirect_object()
+            except ParserException:
+                pass
+        return self.registry.get(num, gen)
+
     def locate_object_in_registry(self, num, gen):
         """ locate in registry """
         if self.registry.is_registered(num, gen):
             return self.registry.get(num, gen)
 
+    def locate_evicted_object(self, num, gen):
+        """ Re-parse an object evicted from size-limited registry at its known offset """
+        offset, _ = self.registry.indirect_object_offsets.get((num, gen), (None, None))
+        if offset is not None:
+            try:
+                self.reset(offset)
+                self.indirect_object()
+            except ParserException:
+                pass
+            return self.registry.get(num, gen)
+
     def locate_object_by_xref(self, num, gen):
-        """ Locate by xref """
+        """ Locate by xref: the newest entry from the merged index, then all xrefs one by one if it fails """
+        xre = self.trailer.xref_index.get(num)
+        if xre is None:
+            # not listed in any xref
+            return self.registry.get(num, gen)
+        if xre.generation == gen:
+            if xre.is_in_use:
+                try:
+                    self.reset(xre.offset)
+                    self.indirect_object()
+                except ParserException:
+                    pass
+            elif xre.is_compressed and xre.number != num:
+                self.locate_object(xre.number, xre.generation)
+            if self.registry.is_registered(num, gen):
+                return self.registry.get(num, gen)
+
         for xref in self.trailer.xrefs:
             # try to find in-use object
             xre = xref.in_use.get(num)
@@ -486,7 +568,9 @@ class RegistryPDFParser(PDFParser):
 
         Objects lookup order:
           #. Known objects in registry (located before)
+          #. Objects evicted from size-limited registry by their offsets
           #. XRef tables lookups
+          #. Offsets index built by one pass over the file (repair mode)
           #. Brute-force reading objects one by one from file start
 
         :param num: object number
@@ -497,11 +581,23 @@ class RegistryPDFParser(PDFParser):
 
         :return: instance of one of supported PDF types (incl. null object) if found, null object otherwise.
                  Doesn't resolve indirect references.
+
+        Objects with falsy values are found by xref as well: the file is not scanned
+
+        >>> from pdfreader.registry import Registry
+        >>> body = b'%PDF-1.4\\n1 0 obj << /Type /Catalog >> endobj\\n2 0 obj [] endobj\\n'
+        >>> xref = b'xref\\n0 3\\n0000000000 65535 f \\n0000000009 00000 n \\n0000000045 00000 n \\n'
+        >>> trailer = b'trailer << /Size 3 /Root 1 0 R >>\\nstartxref\\n%d\\n%%%%EOF\\n' % len(body)
+        >>> p = RegistryPDFParser(body + xref + trailer, Registry())
+        >>> p.locate_object(2, 0), 'objects_offsets' in p.__dict__
+        ([], False)
         """
-        # locate in registry
-        obj = self.locate_object_in_registry(num, gen) or self.locate_object_by_xref(num, gen)
-        if obj:
-            return obj
+        for lookup in (self.locate_object_in_registry, self.locate_evicted_object, self.locate_object_by_xref,
+                       self.locate_object_by_offsets_index):
+            obj = lookup(num, gen)
+            # the value itself may be falsy: 0, [], null
+            if self.registry.is_registered(num, gen):
+                return obj
 
         while not self.registry.is_registered(num, gen):
             if (num, gen) in self.brute_force_lookup_stack:
@@ -551,7 +647,7 @@ class RegistryPDFParser(PDFParser):
     def locate_backwards_from_trailer(self, num, gen):
         """ Locates object backwards starting from trailer.
         """
-        saved_state = self.get_state()
+        mark = self.mark()
 
         self.reset(self.xref_offset())
 
@@ -568,7 +664,7 @@ class RegistryPDFParser(PDFParser):
                 obj_header = self.read(chunk_len)
                 if len(obj_header) < chunk_len:
                     return
-        except TypeError:
+        except ParserException:
             # Issue 135: https://github.com/maxpmaxp/pdfreader/issues/135
             logging.debug("Failed to locate backwards from trailer")
             return
@@ -576,35 +672,32 @@ class RegistryPDFParser(PDFParser):
         self.read_backward(chunk_len)
         obj = self.indirect_object()
         self.registry.register(obj)
-        self.set_state(saved_state)
+        self.rewind(mark)
         return obj.val
 
     def skip_until_next_indirect_object(self):
         """ This method is just an attempt to locate end of the current object, and may get broken by some
             specific example. Makes sense for brute-force objects lookup only
         """
-        token = self.read(6)
-        while token != b"endobj":
-            token = token[1:] + self.read(1)
+        pos = self.buffer.find(b"endobj")
+        if pos < 0:
+            self.on_parser_error("endobj expected")
+        self.rewind(pos + 6)
         self.maybe_spaces_or_comments()
 
     def skip_backwards_until(self, s):
+        """ Moves pointer to the beginning of the nearest `s` before the current byte """
         self.prev()
-        l = len(s)
-        token = self.read_backward(l)
-        while token != s:
-            token = self.prev() + token[:-1]
-        self.next()
+        pos = self.buffer.rfind(s)
+        if pos < 0:
+            self.on_parser_error("{} not found".format(s.decode(DEFAULT_ENCODING)))
+        self.rewind(pos)
 
     def skip_until_prev_indirect_object(self):
         """ This method is just an attempt to locate end of the current object, and may get broken by some
             specific example. Makes sense for brute-force objetcs lookup only
         """
-        self.prev()
-        token = self.read_backward(6)
-        while token != b"endobj":
-            token = self.prev() + token[:-1]
-        self.next()
+        self.skip_backwards_until(b"endobj")
         self.read(6)
         self.maybe_spaces_or_comments()
 
@@ -614,17 +707,20 @@ class RegistryPDFParser(PDFParser):
             # Stream length may come as an indirect object.
             # See https://stackoverflow.com/questions/50325459/how-to-parse-a-binary-pdf-stream-of-unknown-length/50334477#50334477
             # And also https://github.com/maxpmaxp/pdfreader/issues/34 where an example is.
-            buffer_state = self.get_state()
+            mark = self.mark()
             d['Length'] = self.locate_object(length.num, length.gen)
-            self.set_state(buffer_state)
+            self.rewind(mark)
         res = super(RegistryPDFParser, self)._stream(d)
+        if self.max_decoded_size is not None:
+            res.max_decoded_size = self.max_decoded_size
         return res
 
     def indirect_object(self):
+        b_offset = self.mark()
         obj = super(RegistryPDFParser, self).indirect_object()
         obj = self.decrypt_indirect_object_if_necessary(obj)
         # handle all known indirect objects
-        self.on_parsed_indirect_object(obj)
+        self.on_parsed_indirect_object(obj, b_offset, self.mark())
         return obj
 
 
@@ -1,9 +1,37 @@
-from ..constants import WHITESPACES
+from ..constants import WHITESPACES, DELIMITERS, COLOR_COMPONENTS
 from ..types.content import InlineImage
-from ..types.native import Token
+from ..types.native import Token, Array
 from .base import BasicTypesParser
 
 
+def unfiltered_data_length(image):
+    """ Expected data length of unfiltered inline image or None if it can't be figured out
+
+    >>> unfiltered_data_length(InlineImage({'W': 10, 'H': 2, 'BPC': 8, 'CS': 'RGB'}, None))
+    60
+    >>> unfiltered_data_length(InlineImage({'W': 10, 'H': 2, 'IM': True}, None))
+    4
+    >>> unfiltered_data_length(InlineImage({'W': 10, 'H': 2, 'BPC': 8, 'CS': 'RGB', 'F': 'AHx'}, None)) is None
+    True
+    >>> unfiltered_data_length(InlineImage({'W': 10, 'H': 2, 'BPC': 8, 'CS': 'CS0'}, None)) is None
+    True
+    """
+    if image.Filter:
+        return None
+    width, height = image.Width, image.Height
+    if image.ImageMask:
+        bpc, n_components = 1, 1
+    else:
+        bpc, cs = image.BitsPerComponent, image.ColorSpace
+        if isinstance(cs, Array) and cs:
+            cs = cs[0]
+        n_components = COLOR_COMPONENTS.get(cs) if isinstance(cs, str) else None
+    if not all(isinstance(v, int) and v > 0 for v in (width, height, bpc, n_components)):
+        return None
+    # every row starts at byte boundary
+    return height * ((width * n_components * bpc + 7) // 8)
+
+
 class InlineImageParser(BasicTypesParser):
     """ BI/EI section parser
 
@@ -51,21 +79,63 @@ class InlineImageParser(BasicTypesParser):
         if not self.is_whitespace:
             self.on_parser_error("Whitespace expected")
         self.next()
-        # read until whitespace + ID
-        data = b''
+        res = InlineImage(entities, None)
+        length = unfiltered_data_length(res)
+        res.data = self.data_of_length(length) if length is not None else None
+        if res.data is None:
+            res.data = self.data_until_ei()
+        return res
+
+    def data_of_length(self, length):
+        """ Reads image data of known length. Returns None if it's not followed by EI.
+
+        >>> p = InlineImageParser(b'EI EI\\nEI Q')
+        >>> p.data_of_length(5), p.current
+        (b'EI EI', b' ')
+        >>> p = InlineImageParser(b'EI EI\\nEI Q')
+        >>> p.data_of_length(4), p.current
+        (None, b'E')
+        """
+        mark = self.mark()
+        data = bytes(self.buffer.read_view(length))
+        self.maybe_spaces()
+        if len(data) == length and self.read(2) == b'EI' and self.current in WHITESPACES + DELIMITERS + (None,):
+            return data
+        self.rewind(mark)
+
+    def data_until_ei(self):
+        """ Reads image data up to <whitespace>EI or EI<whitespace> whatever comes first
+
+        >>> p = InlineImageParser(b'data\\nEI Q')
+        >>> p.data_until_ei(), p.current
+        (b'data', b' ')
+        >>> p = InlineImageParser(b'EIdaEIta EI\\nQ')
+        >>> p.data_until_ei(), p.current
+        (b'EIdaEIta', b'\\n')
+        >>> p = InlineImageParser(b'dataEI\\nQ')
+        >>> p.data_until_ei(), p.current
+        (b'data', b'Q')
+        """
+        start = ei = self.mark()
         while True:
-            data += self.next()
-            # <content><whitespace>EI or <content>EI<whitespace>
-            ei_reached = \
-                   (data.endswith(b'EI') and data[-3:-2] in WHITESPACES) \
-                or (data[-3:-1] == b'EI' and data[-1:] in WHITESPACES)
-
-            if ei_reached:
-                data = data[:-3]
+            self.rewind(ei)
+            ei = self.buffer.find(b'EI')
+            if ei < 0:
+                self.on_parser_error("EI expected")
+            if ei > start:
+                self.rewind(ei - 1)
+                if self.current in WHITESPACES:
+                    end, stop = ei - 1, ei + 2
+                    break
+            self.rewind(ei + 2)
+            if self.current in WHITESPACES:
+                end, stop = ei, ei + 3
                 break
-
-        res = InlineImage(entities, data)
-        return res
+            ei += 1
+        self.rewind(start)
+        data = bytes(self.buffer.read_view(end - start))
+        self.rewind(stop)
+        return data
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+""" Compiled patterns recognizing whole PDF lexical tokens at once.
+
+    Parsers match them against the buffer data with :meth:`~pdfreader.buffer.Buffer.match`
+    instead of walking bytes one by one.
+"""
+import re
+
+from ..constants import WHITESPACES, DELIMITERS
+
+#: all whitespace characters
+WHITESPACE_CHARS = b''.join(WHITESPACES)
+
+_WS = re.escape(WHITESPACE_CHARS)
+_DELIMITERS = re.escape(b''.join(DELIMITERS))
+_REGULAR = b'[^' + _WS + _DELIMITERS + b']'
+
+#: optional whitespaces
+SPACES = re.compile(b'[' + _WS + b']*')
+
+#: optional whitespaces and comments mixed. Text can be split into them only one way:
+#: a whitespace character at a time and comments up to EOL, so failed matches don't backtrack exponentially
+SPACES_OR_COMMENTS = re.compile(b'(?:[' + _WS + b']|%[^\r\n]*(?![^\r\n]))*')
+
+#: comment without EOL
+COMMENT = re.compile(br'%[^\r\n]*')
+
+#: integer or real: sign, integer part, point, fractional part
+NUMERIC = re.compile(br'([+-]?)(\d*)(\.?)(\d*)')
+
+#: indirect reference `num gen R`: both numbers are non-negative integers
+INDIRECT_REFERENCE = re.compile(br'(\d+)(?![\d.])' + SPACES_OR_COMMENTS.pattern
+                                + br'(\+?\d+|-0+)(?![\d.])' + SPACES_OR_COMMENTS.pattern + b'R')
+
+#: indirect object header `num gen obj` standing alone
+OBJECT_HEADER = re.compile(b'(?<!' + _REGULAR + br')(\d+)[' + _WS + br']+(\d+)[' + _WS + br']+obj(?!'
+                           + _REGULAR + b')')
+
+#: /Name with possibly escaped characters like #20
+NAME = re.compile(b'/(' + _REGULAR + b'*)')
+NAME_ESCAPE = re.compile(br'#([0-9A-Fa-f]{2})')
+
+#: hexadecimal string without comments inside
+HEXSTRING = re.compile(b'<([0-9A-Fa-f' + _WS + b']*)>')
+
+#: literal string part without parenthesis and escapes
+STRING_CHUNK = re.compile(br'[^()\\]*')
+
+#: sequence of regular characters
+TOKEN = re.compile(_REGULAR + b'+')
+
+
+def unescape_name(token):
+    """ Replaces #XX codes on names
+
+    >>> unescape_name(b'Name#20with#20spaces')
+    b'Name with spaces'
+
+    >>> unescape_name(b'Name#with!^speci_#0_als#')
+    b'Name#with!^speci_#0_als#'
+    """
+    if b'#' in token:
+        token = NAME_ESCAPE.sub(lambda m: bytes((int(m.group(1), 16),)), token)
+    return token
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
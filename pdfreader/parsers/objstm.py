@@ -1,16 +1,39 @@
+from ..buffer import MMapBuffer
 from ..types import IndirectObject
 from .base import BasicTypesParser
 
 
 class ObjStmParser(BasicTypesParser):
+    """ Parses decoded object stream data. Objects are accessed at random, so the data is served without copying.
 
-    def objects(self, first_offset, n_objects):
+    >>> data = b'11 0 12 5 (abc) [1 2]'
+    >>> p = ObjStmParser(data)
+    >>> p.header(2)
+    [(11, 0), (12, 5)]
+    >>> p.object_at(10 + 5)
+    [1, 2]
+    >>> list(ObjStmParser(data).objects(10, 2))
+    [<IndirectObject:n=11,g=0,v=b'abc'>, <IndirectObject:n=12,g=0,v=[1, 2]>]
+    """
+
+    def __init__(self, data, offset=0, **kwargs):
+        super(ObjStmParser, self).__init__(MMapBuffer(data, offset), **kwargs)
+
+    def header(self, n_objects):
+        """ :return: list of object number and offset pairs. Offsets are relative to the first object. """
+        self.reset(0)
         integers = []
         for i in range(2 * n_objects):
             self.maybe_spaces_or_comments()
             integers.append(self.non_negative_int())
+        return list(zip(integers[::2], integers[1::2]))
 
-        for j in range(n_objects):
-            num, offset = integers[2 * j: 2 * j + 2]
-            self.reset(first_offset + offset)
-            yield IndirectObject(num, 0, self.object())
+    def object_at(self, offset):
+        """ Parses a single object starting at the data offset """
+        self.reset(offset)
+        return self.object()
+
+    def objects(self, first_offset, n_objects):
+        for num, offset in self.header(n_objects):
+            # generation is always 0 for compressed objects
+            yield IndirectObject(num, 0, self.object_at(first_offset + offset))
@@ -1,7 +1,7 @@
 import unittest
 import doctest
 
-from . import base, cmap, document, inlineimage, content
+from . import base, cmap, document, inlineimage, content, lexer, objstm
 
 
 def suite():
@@ -11,6 +11,8 @@ def suite():
     suite.addTests(doctest.DocTestSuite(cmap))
     suite.addTests(doctest.DocTestSuite(document))
     suite.addTests(doctest.DocTestSuite(inlineimage))
+    suite.addTests(doctest.DocTestSuite(lexer))
+    suite.addTests(doctest.DocTestSuite(objstm))
     return suite
 
 
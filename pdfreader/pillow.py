@@ -1,30 +1,139 @@
 import logging
 log = logging.getLogger(__name__)
 
+import sys
+from array import array
 from io import BytesIO
 
-from bitarray import bitarray
 from PIL import Image
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .constants import COLOR_COMPONENTS
 from .types.native import Array, Stream, HexString
 
+#: translate() tables extracting samples of 1, 2 and 4 bits from a byte: one table per sample position
+UNPACK_TABLES = {bpc: [bytes((b >> shift) & ((1 << bpc) - 1) for b in range(256)) for shift in range(8 - bpc, -1, -bpc)]
+                 for bpc in (1, 2, 4)}
+
+#: inverts 1-bit data
+INVERT_TABLE = bytes(255 - b for b in range(256))
+
+
+def color_components(cs):
+    """ Number of color components of a color space or None if it can't be figured out
+
+    >>> color_components('DeviceRGB'), color_components(['Indexed', 'DeviceRGB', 255, b'']), color_components('CS0')
+    (3, 1, None)
+    >>> color_components(['DeviceN', ['Cyan', 'Black'], 'DeviceCMYK', None])
+    2
+    """
+    if isinstance(cs, Array) and cs:
+        if cs[0] == 'ICCBased':
+            return cs[1].get('N')
+        if cs[0] == 'Separation':
+            return 1
+        if cs[0] == 'DeviceN':
+            return len(cs[1])
+        cs = cs[0]
+    return COLOR_COMPONENTS.get(cs) if isinstance(cs, str) else None
+
+
+def unpack_samples(data, bpc, row_samples=None):
+    """ Unpacks samples of 1, 2, 4, 8 or 16 bits into an array of unsigned integers.
+        Every row of *row_samples* samples starts at byte boundary; padding bits are dropped.
+
+    >>> unpack_samples(b'\\xa5', 1).tolist()
+    [1, 0, 1, 0, 0, 1, 0, 1]
+    >>> unpack_samples(b'\\xe4\\xc0\\x4f\\x00', 2, row_samples=5).tolist()
+    [3, 2, 1, 0, 3, 1, 0, 3, 3, 0]
+    >>> unpack_samples(b'\\x01\\x02\\xff\\xfe', 16).tolist()
+    [258, 65534]
+    """
+    if bpc == 8:
+        return array('B', data)
+    if bpc == 16:
+        samples = array('H')
+        samples.frombytes(data[:len(data) - len(data) % 2])
+        if sys.byteorder == 'little':
+            samples.byteswap()
+        return samples
+    if bpc not in UNPACK_TABLES:
+        raise ValueError("Unsupported BitsPerComponent: {}".format(bpc))
+
+    tables = UNPACK_TABLES[bpc]
+    per_byte = len(tables)
+    unpacked = bytearray(len(data) * per_byte)
+    for i, table in enumerate(tables):
+        unpacked[i::per_byte] = data.translate(table)
+    if row_samples and row_samples % per_byte:
+        stride = -(-row_samples // per_byte) * per_byte
+        unpacked = b''.join([unpacked[i:i + row_samples] for i in range(0, len(unpacked), stride)])
+    return array('B', unpacked)
+
+
+def apply_decode(samples, bpc, decode, n_components=1):
+    """ Maps samples into /Decode ranges: Dmin + sample * (Dmax - Dmin) / (2 ** bpc - 1) for each color component.
+
+    :return: array of the same type if all mapped values are integers of the samples range
+             (like [1 0] inverting 1-bit samples), array of floats otherwise
+
+    >>> apply_decode(array('B', [0, 1, 1]), 1, [1, 0])
+    array('B', [1, 0, 0])
+    >>> apply_decode(array('B', [0, 255, 255, 0, 51, 51]), 8, [0, 1, 1, 0], 2).tolist()
+    [0.0, 0.0, 1.0, 1.0, 0.2, 0.8]
+    >>> apply_decode(array('H', [0, 65535]), 16, [-1, 1]).tolist()
+    [-1.0, 1.0]
+    """
+    max_value = (1 << bpc) - 1
+    n = len(samples) - len(samples) % n_components
+    tables = []
+    for i in range(n_components):
+        d_min, d_max = float(decode[2 * i]), float(decode[2 * i + 1])
+        tables.append([d_min + v * (d_max - d_min) / max_value for v in range(max_value + 1)])
+
+    if all(v.is_integer() and 0 <= v <= max_value for table in tables for v in table):
+        res = array(samples.typecode, samples[:n])
+        for i, table in enumerate(tables):
+            if bpc <= 8:
+                table = bytes(map(int, table)).ljust(256, b'\x00')
+                res[i::n_components] = array('B', samples[i:n:n_components].tobytes().translate(table))
+            else:
+                res[i::n_components] = array('H', map(int, map(table.__getitem__, samples[i:n:n_components])))
+        return res
+
+    res = array('d')
+    if numpy is not None:
+        values = numpy.asarray(samples)[:n].reshape(-1, n_components)
+        out = numpy.empty(values.shape)
+        for i, table in enumerate(tables):
+            out[:, i] = numpy.array(table)[values[:, i]]
+        res.frombytes(out.tobytes())
+    else:
+        res.frombytes(bytes(8 * n))
+        for i, table in enumerate(tables):
+            res[i::n_components] = array('d', map(table.__getitem__, samples[i:n:n_components]))
+    return res
+
 
 class PILImageMixin(object):
 
     @property
     def decoded(self):
-        stream = bitarray()
-        stream.frombytes(self.filtered)
-        values = []
-        for i in range(0, len(stream), self.BitsPerComponent):
-            component = stream[i:i + self.BitsPerComponent]
-            component.reverse()
-            component.fill()
-            component.reverse()
-            index = int.from_bytes(component.tobytes(), 'big')
-            # Decode attr is optional
-            values.append(self.Decode[index] if self.Decode else index)
-        return values
+        """ Image samples unpacked from filtered data with /Decode applied. Row padding bits are skipped.
+
+            :return: `array.array`
+        """
+        bpc = 1 if self.ImageMask else self.BitsPerComponent
+        n_components = 1 if self.ImageMask else color_components(self.ColorSpace)
+        row_samples = self.Width * n_components if n_components and isinstance(self.Width, int) else None
+        samples = unpack_samples(self.filtered, bpc, row_samples)
+        if self.Decode:
+            samples = apply_decode(samples, bpc, self.Decode, n_components or 1)
+        return samples
 
     @staticmethod
     def get_pil_colorspace(pdf_cs):
@@ -64,7 +173,11 @@ class PILImageMixin(object):
         if filter in ('DCTDecode', 'JPXDecode'):
             img = Image.open(BytesIO(self.stream))
         elif filter == 'CCITTFaxDecode' or self.ImageMask:
-            img = Image.frombytes("1", size, bitarray(self.decoded).tobytes())
+            # 1-bit rows are padded to byte boundary the same way in PDF and PIL: no unpacking needed
+            raw = bytes(self.filtered)
+            if self.Decode and self.Decode[0] == 1:
+                raw = raw.translate(INVERT_TABLE)
+            img = Image.frombytes("1", size, self._recover_broken_image_if_necessary("1", size, raw))
         else:
             # FlateDecode and others
             if isinstance(self.ColorSpace, Array):
@@ -90,9 +203,97 @@ class PILImageMixin(object):
 
         return img
 
+    def to_numpy(self):
+        """ Converts image into NumPy array of (Height, Width, components) shape. Requires NumPy.
+
+            Samples are integers of 0 ... 2 ** BitsPerComponent - 1 range (uint8 or uint16 array),
+            or floats if /Decode maps them to non-integer values. The array is a view over :attr:`decoded` buffer,
+            except for indexed images: those are converted to base color space components (uint8).
+            /SMask data is appended as the last component scaled to the range of the image samples.
+            DCT and JPX encoded images are decoded with PIL.
+
+            :return:  numpy.ndarray
+
+            >>> from pdfreader.types.content import InlineImage
+            >>> InlineImage({'W': 2, 'H': 1, 'BPC': 16, 'CS': 'RGB'}, bytes(range(12))).to_numpy().tolist()
+            [[[1, 515, 1029], [1543, 2057, 2571]]]
+            >>> img = InlineImage({'W': 3, 'H': 1, 'BPC': 2, 'CS': ['I', 'G', 2, b'\\x00\\x80\\xff']}, b'\\x18')
+            >>> img.to_numpy().tolist()
+            [[[0], [128], [255]]]
+            >>> img = InlineImage({'W': 2, 'H': 2, 'IM': True, 'D': [1, 0]}, b'\\x40\\x80')
+            >>> img.to_numpy()[:, :, 0].tolist()
+            [[1, 0], [0, 1]]
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required to convert images to arrays")
+        values, max_value = self._numpy_samples()
+
+        smask = getattr(self, "SMask", None)
+        if isinstance(smask, PILImageMixin):
+            alpha, alpha_max = smask._numpy_samples()
+            height, width = values.shape[:2]
+            if alpha.shape[:2] != (height, width):
+                # nearest neighbour resampling
+                rows = numpy.arange(height) * alpha.shape[0] // height
+                columns = numpy.arange(width) * alpha.shape[1] // width
+                alpha = alpha[rows][:, columns]
+            alpha = alpha[:, :, :1] * (max_value / alpha_max)
+            if values.dtype.kind != 'f':
+                alpha = alpha.round()
+            values = numpy.concatenate([values, alpha.astype(values.dtype)], axis=2)
+        return values
+
+    def _numpy_samples(self):
+        """ Image samples as (Height, Width, components) array and the maximal sample value """
+        filter = self.Filter
+        if isinstance(filter, Array):
+            filter = filter[-1]
+        if filter in ('DCTDecode', 'JPXDecode'):
+            values = numpy.asarray(Image.open(BytesIO(self.stream)))
+            if values.ndim == 2:
+                values = values[:, :, None]
+            return values, (255 if values.dtype == numpy.uint8 else 65535)
+
+        bpc = 1 if self.ImageMask else self.BitsPerComponent
+        cs = self.ColorSpace
+        n_components = 1 if self.ImageMask else color_components(cs)
+        if not n_components:
+            raise ValueError("Unsupported color space: {}".format(cs))
+        samples = self.decoded
+        values = numpy.frombuffer(samples, dtype=samples.typecode)
+        size = self.Height * self.Width * n_components
+        if len(values) > size:
+            log.debug("Too many samples for the image. Truncating.")
+            values = values[:size]
+        elif len(values) < size:
+            log.debug("Not enough samples for the image. Appending zeros.")
+            values = numpy.concatenate([values, numpy.zeros(size - len(values), dtype=values.dtype)])
+        values = values.reshape(self.Height, self.Width, n_components)
+        max_value = 1.0 if values.dtype.kind == 'f' else (1 << bpc) - 1
+
+        if isinstance(cs, Array) and cs[0] in ('Indexed', 'I'):
+            base_cs, hival, lookup = cs[1], cs[2], cs[3]
+            if isinstance(lookup, Stream):
+                lookup = lookup.filtered
+            elif isinstance(lookup, HexString):
+                lookup = lookup.to_bytes()
+            base_components = color_components(base_cs)
+            if not base_components:
+                raise ValueError("Unsupported base color space: {}".format(base_cs))
+            palette = numpy.frombuffer(bytes(lookup), dtype=numpy.uint8)
+            palette = palette[:len(palette) - len(palette) % base_components].reshape(-1, base_components)
+            indexes = values[:, :, 0]
+            if indexes.dtype.kind == 'f':
+                indexes = indexes.round().astype(int)
+            values = palette[numpy.clip(indexes, 0, min(hival, len(palette) - 1))]
+            max_value = 255
+        return values, max_value
+
     def _recover_broken_image_if_necessary(self, cs, size, raw):
         n_pixels = size[0] * size[1]
-        if cs == 'RGB':
+        if cs == '1':
+            expected_size = size[1] * ((size[0] + 7) // 8)
+        elif cs == 'RGB':
             expected_size = n_pixels * 3
         elif cs == 'CMYK':
             expected_size = n_pixels * 4
@@ -1,48 +1,198 @@
 import logging
 log = logging.getLogger(__name__)
 
+import sys
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from .exceptions import ParserException
 from .parsers import ObjStmParser
-from .types import Stream
+from .types import Stream, Dictionary, IndirectObject
+from .types.native import apply_filter_multi
+
+#: default limit of decoded object streams data kept in memory, bytes
+OBJSTM_CACHE_SIZE = 16 * 2**20
+
+#: types of objects never evicted from a size-limited registry: they are needed on every page access
+PINNED_TYPES = ('Catalog', 'Pages')
+
+
+def object_size(obj):
+    """ Rough estimate of memory taken by a parsed object, bytes
+
+    >>> object_size(b'x' * 1000) > 1000
+    True
+    >>> object_size({'Kids': [1, 2, 3]}) > object_size([1, 2, 3])
+    True
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, Stream):
+        # payload left in the file doesn't count
+        size += object_size(obj.dictionary) + sys.getsizeof(obj._stream)
+    elif isinstance(obj, list):
+        size += sum(object_size(o) for o in obj)
+    elif isinstance(obj, dict):
+        size += sum(object_size(k) + object_size(v) for k, v in obj.items())
+    return size
 
 
 class Registry(object):
 
-    """ Registry of known indirect objects  """
+    """ Registry of known indirect objects
+
+        Objects from object streams are registered lazily: only ObjStm header is parsed
+        and an object is built on the first access.
+
+        :param max_size: Optional. Memory budget for registered objects, bytes. The least recently used objects
+                         are evicted when it's exceeded. Parser locates them again by their offsets on demand.
+                         Catalog, page tree nodes, pinned objects and objects of unknown location are never evicted.
+                         Unlimited by default.
 
-    def __init__(self):
+        >>> from pdfreader.types import Stream, String
+        >>> data = b'11 0 12 5 (abc) [1 2]'
+        >>> objstm = Stream({'Type': 'ObjStm', 'N': 2, 'First': 10, 'Length': len(data)}, data)
+        >>> r = Registry()
+        >>> r.register(IndirectObject(10, 0, objstm))
+        >>> r.is_registered(12, 0), (12, 0) in r.known_indirect_objects
+        (True, False)
+        >>> r.get(12, 0)
+        [1, 2]
+        >>> r.is_registered(11, 0), (11, 0) in r.known_indirect_objects
+        (True, False)
+
+        Size-limited registry
+
+        >>> r = Registry(max_size=3000)
+        >>> r.register(IndirectObject(1, 0, String(b'1' * 2000)), b_offset=10)
+        >>> r.register(IndirectObject(2, 0, String(b'2' * 2000)), b_offset=2500)
+        >>> r.is_registered(1, 0), r.is_registered(2, 0), r.indirect_object_offsets[(1, 0)]
+        (False, True, (10, None))
+        >>> r.register(IndirectObject(3, 0, {'Type': 'Pages'}))
+        >>> r.register(IndirectObject(4, 0, String(b'4' * 2000)), b_offset=5000)
+        >>> r.is_registered(2, 0), r.is_registered(3, 0), r.is_registered(4, 0)
+        (False, True, True)
+    """
+
+    def __init__(self, real_type=Decimal, objstm_cache_size=OBJSTM_CACHE_SIZE, max_size=None):
+        # type of real numbers within object streams
+        self.real_type = real_type
         self.known_indirect_objects = {}
         # id -> begin/end offsets. End means the next byte after obj
         # this may help to implement different indirect references resolution strategies
         self.indirect_object_offsets = {}
         self.next_brute_force_offset = None
+        # compressed objects not built yet: number -> (ObjStm id, object offset within decoded data)
+        self.compressed_objects = {}
+        # ObjStm id -> stream
+        self.object_streams = {}
+        # parsers over decoded data of recently used object streams, the least recently used first
+        self.objstm_cache = OrderedDict()
+        self.objstm_cache_size = objstm_cache_size
+        self.objstm_cache_used = 0
+        self.max_size = max_size
+        # evictable objects, the least recently used first: (num, gen) -> (size, ObjStm location or None)
+        self.lru = OrderedDict()
+        self.size = 0
+        self.pinned = set()
 
     def is_registered(self, n, gen):
-        return (n, gen) in self.known_indirect_objects
+        return (n, gen) in self.known_indirect_objects or (gen == 0 and n in self.compressed_objects)
 
-    def register(self, obj, b_offset=None, e_offset=None, force=False):
+    def register(self, obj, b_offset=None, e_offset=None, force=False, objstm_location=None):
         if force or not self.is_registered(obj.num, obj.gen):
             key = obj.num, obj.gen
+            if obj.gen == 0:
+                self.compressed_objects.pop(obj.num, None)
             self.known_indirect_objects[key] = obj.val
             self.indirect_object_offsets[key] = (b_offset, e_offset)
             log.debug("Indirect object registered: {key} -> {val}".format(key=key, val=obj.val))
+            if self.max_size is not None:
+                self.track(key, obj.val, b_offset is not None or objstm_location is not None, objstm_location)
 
             if isinstance(obj.val, Stream):
                 if obj.val.get("Type") == "ObjStm":
                     log.debug("Registering ObjStm {}".format(key))
-                    self.register_object_stream(obj.val)
+                    self.register_object_stream(key, obj.val)
 
     def get(self, n, gen):
         key = n, gen
+        if key not in self.known_indirect_objects and gen == 0 and n in self.compressed_objects:
+            self.build_compressed_object(n)
+        if key in self.lru:
+            self.lru.move_to_end(key)
         return self.known_indirect_objects.get(key)
 
-    def __getitem__(self, key):
-        return self.known_indirect_objects[key]
+    def pin(self, n, gen):
+        """ Never evict the object from size-limited registry """
+        key = n, gen
+        self.pinned.add(key)
+        if key in self.lru:
+            size, _ = self.lru.pop(key)
+            self.size -= size
 
-    def register_object_stream(self, objstm):
-        parser = ObjStmParser(objstm.filtered)
+    def track(self, key, val, relocatable, objstm_location):
+        """ Accounts the object in size-limited registry and evicts the least recently used ones if necessary """
+        if isinstance(val, Dictionary) and val.get("Type") in PINNED_TYPES:
+            self.pinned.add(key)
+        old = self.lru.pop(key, None)
+        if old:
+            self.size -= old[0]
+        if relocatable and key not in self.pinned:
+            size = object_size(val)
+            self.lru[key] = size, objstm_location
+            self.size += size
+        # keep the latest one in any case
+        while self.size > self.max_size and len(self.lru) > 1:
+            self.evict()
 
-        for obj in parser.objects(objstm["First"], objstm["N"]):
+    def evict(self):
+        """ Drops the least recently used object. It can be located again by its offset in file or ObjStm. """
+        key, (size, objstm_location) = self.lru.popitem(last=False)
+        self.size -= size
+        del self.known_indirect_objects[key]
+        if objstm_location is not None:
+            self.compressed_objects[key[0]] = objstm_location
+        log.debug("Indirect object evicted: {}".format(key))
+
+    def __getitem__(self, key):
+        res = self.get(*key)
+        if res is None and key not in self.known_indirect_objects:
+            raise KeyError(key)
+        return res
+
+    def register_object_stream(self, key, objstm):
+        """ Registers ObjStm members by its header. The objects are built on demand. """
+        self.object_streams[key] = objstm
+        first = objstm["First"]
+        for num, offset in self.objstm_parser(key).header(objstm["N"]):
             # generation is always 0 for compressed objects
-            self.register(obj)
-            log.debug("Compressed object registered {} {}".format(obj.num, obj.gen))
+            if not self.is_registered(num, 0):
+                self.compressed_objects[num] = key, first + offset
+        log.debug("ObjStm {} header registered".format(key))
+
+    def build_compressed_object(self, n):
+        key, offset = self.compressed_objects.pop(n)
+        try:
+            obj = IndirectObject(n, 0, self.objstm_parser(key).object_at(offset))
+        except ParserException:
+            log.exception("Failed to parse compressed object {} from ObjStm {}".format(n, key))
+            return
+        self.register(obj, objstm_location=(key, offset))
+        log.debug("Compressed object registered {} {}".format(obj.num, obj.gen))
 
+    def objstm_parser(self, key):
+        """ Parser over decoded ObjStm data: taken from the cache or decoded again """
+        parser = self.objstm_cache.pop(key, None)
+        if parser is None:
+            objstm = self.object_streams[key]
+            data = apply_filter_multi(objstm.get('Filter'), objstm.stream, objstm.get('DecodeParms'),
+                                      objstm.max_decoded_size)
+            parser = ObjStmParser(data, real_type=self.real_type)
+            self.objstm_cache_used += len(data)
+            # evict the least recently used ones, but keep the latest
+            while self.objstm_cache and self.objstm_cache_used > self.objstm_cache_size:
+                _, evicted = self.objstm_cache.popitem(last=False)
+                self.objstm_cache_used -= len(evicted.buffer.data)
+        self.objstm_cache[key] = parser
+        return parser
@@ -0,0 +1,92 @@
+import unittest
+import zlib
+from io import BytesIO
+
+from PIL import Image as PILImage
+
+from .document import PDFDocument
+from .pillow import numpy
+from .types.native import IndirectReference
+
+
+def make_pdf(objects):
+    """ PDF file with the given indirect objects numbered from 1 and a valid xref """
+    res = b'%PDF-1.4\n'
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(len(res))
+        res += b'%d 0 obj\n' % num + obj + b'\nendobj\n'
+    startxref = len(res)
+    res += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    res += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    res += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, startxref)
+    return res
+
+
+def image(entries, data):
+    """ Image XObject source """
+    return b'<< /Type /XObject /Subtype /Image ' + entries + b' /Length %d >>\nstream\n' % len(data) \
+           + data + b'\nendstream'
+
+
+def load_images(*images):
+    """ Image objects numbered from 3: objects 1 and 2 are the catalog and the page tree """
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', b'<< /Type /Pages /Kids [] /Count 0 >>'] + list(images)
+    doc = PDFDocument(make_pdf(objects))
+    return [doc.obj_by_ref(IndirectReference(num, 0)) for num in range(3, len(objects) + 1)]
+
+
+RGB = bytes([255, 0, 0, 0, 255, 0, 0, 0, 255, 9, 9, 9])
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestToNumpy(unittest.TestCase):
+
+    def test_smask(self):
+        img, _ = load_images(
+            image(b'/Width 2 /Height 2 /BitsPerComponent 8 /ColorSpace /DeviceRGB /SMask 4 0 R /Filter /FlateDecode',
+                  zlib.compress(RGB)),
+            image(b'/Width 2 /Height 2 /BitsPerComponent 1 /ColorSpace /DeviceGray', bytes([0b10000000, 0b01000000])))
+        arr = img.to_numpy()
+        self.assertEqual((arr.shape, arr.dtype), ((2, 2, 4), numpy.uint8))
+        self.assertEqual(arr[:, :, :3].reshape(-1).tobytes(), RGB)
+        # 1-bit alpha is scaled to 8-bit samples range
+        self.assertEqual(arr[:, :, 3].tolist(), [[255, 0], [0, 255]])
+
+    def test_smask_resampled(self):
+        img, _ = load_images(
+            image(b'/Width 2 /Height 2 /BitsPerComponent 16 /ColorSpace /DeviceGray /SMask 4 0 R',
+                  bytes([0, 1, 0, 2, 0, 3, 0, 4])),
+            image(b'/Width 1 /Height 2 /BitsPerComponent 8 /ColorSpace /DeviceGray', bytes([0, 255])))
+        arr = img.to_numpy()
+        self.assertEqual((arr.shape, arr.dtype), ((2, 2, 2), numpy.uint16))
+        self.assertEqual(arr[:, :, 0].tolist(), [[1, 2], [3, 4]])
+        # 1x2 mask is stretched over 2x2 image, alpha is scaled to 16-bit samples range
+        self.assertEqual(arr[:, :, 1].tolist(), [[0, 0], [65535, 65535]])
+
+    def test_decode_floats(self):
+        img, = load_images(image(b'/Width 2 /Height 1 /BitsPerComponent 8 /ColorSpace /DeviceGray /Decode [1 0.5]',
+                                 bytes([0, 255])))
+        arr = img.to_numpy()
+        self.assertEqual((arr.shape, arr.dtype), ((1, 2, 1), numpy.float64))
+        self.assertEqual(arr.reshape(-1).tolist(), [1.0, 0.5])
+
+    def test_cmyk(self):
+        data = bytes(range(16))
+        img, = load_images(image(b'/Width 2 /Height 2 /BitsPerComponent 8 /ColorSpace /DeviceCMYK', data))
+        arr = img.to_numpy()
+        self.assertEqual((arr.shape, arr.dtype), ((2, 2, 4), numpy.uint8))
+        self.assertEqual(arr.tobytes(), data)
+
+    def test_dct(self):
+        cases = (("RGB", b'/DeviceRGB', 3), ("CMYK", b'/DeviceCMYK', 4), ("L", b'/DeviceGray', 1))
+        for mode, cs, n_components in cases:
+            jpeg = BytesIO()
+            PILImage.new(mode, (4, 2), "white").save(jpeg, "JPEG")
+            entries = b'/Width 4 /Height 2 /BitsPerComponent 8 /ColorSpace ' + cs + b' /Filter /DCTDecode'
+            img, = load_images(image(entries, jpeg.getvalue()))
+            with self.subTest(mode):
+                arr = img.to_numpy()
+                expected = numpy.asarray(PILImage.open(BytesIO(jpeg.getvalue()))).reshape(2, 4, n_components)
+                self.assertEqual((arr.shape, arr.dtype), ((2, 4, n_components), numpy.uint8))
+                self.assertTrue((arr == expected).all())
@@ -1,7 +1,7 @@
 import unittest
 import doctest
 
-import pdfreader.buffer, pdfreader.document, pdfreader.utils
+import pdfreader.buffer, pdfreader.document, pdfreader.index, pdfreader.pillow, pdfreader.registry, pdfreader.utils
 
 
 def suite():
@@ -9,6 +9,9 @@ def suite():
     suite = loader.discover('.')
     suite.addTests(doctest.DocTestSuite(pdfreader.buffer))
     suite.addTests(doctest.DocTestSuite(pdfreader.document))
+    suite.addTests(doctest.DocTestSuite(pdfreader.index))
+    suite.addTests(doctest.DocTestSuite(pdfreader.pillow))
+    suite.addTests(doctest.DocTestSuite(pdfreader.registry))
     suite.addTests(doctest.DocTestSuite(pdfreader.utils))
     return suite
 
@@ -1,4 +1,7 @@
 
+from .xref import XRefIndex
+
+
 class PDFHeader(object):
     """ %PDF1.3 """
     def __init__(self, version, offset=None):
@@ -21,9 +24,11 @@ class PDFTrailer(object):
 
         or a trailer from a stream
     """
-    def __init__(self, xrefs, **kwargs):
+    def __init__(self, xrefs, xref_index=None, **kwargs):
         self.xrefs = xrefs
         self.params = kwargs
+        #: merged index of all xrefs
+        self.xref_index = XRefIndex(xrefs) if xref_index is None else xref_index
 
     @property
     def root(self):
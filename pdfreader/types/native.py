@@ -3,8 +3,8 @@ log = logging.getLogger(__name__)
 
 from decimal import Decimal
 
-from ..constants import DEFAULT_ENCODING
-from ..filters import apply_filter
+from ..constants import DEFAULT_ENCODING, STREAM_CHUNK_SIZE
+from ..filters import apply_filter, iter_apply_filter, read_limited
 from ..utils import cached_property
 
 
@@ -38,9 +38,19 @@ class HexString(str):
         return bytes.fromhex(self)
 
 
-def apply_filter_multi(filters, binary, params):
+def filters_with_params(filters, params):
+    """ Pairs filters with their DecodeParms.
+        An array of parameters goes one by one, a single dictionary goes to every filter.
+
+    >>> filters_with_params(Name('FlateDecode'), {'Predictor': 12})
+    [('FlateDecode', {'Predictor': 12})]
+    >>> filters_with_params([Name('A85'), Name('LZW')], [None, {'EarlyChange': 0}])
+    [('A85', None), ('LZW', {'EarlyChange': 0})]
+    >>> filters_with_params([Name('A85'), Name('LZW')], None)
+    [('A85', None), ('LZW', None)]
+    """
     if not filters:
-        return binary
+        return []
 
     if isinstance(filters, Array):
         farr = filters
@@ -50,10 +60,21 @@ def apply_filter_multi(filters, binary, params):
     else:
         raise TypeError("Incorrect filter type: {}".format(filters))
 
+    if isinstance(params, Array):
+        params = params + [None] * (len(farr) - len(params))
+    else:
+        params = [params] * len(farr)
+    return list(zip(farr, params))
+
+
+def apply_filter_multi(filters, binary, params, max_length=None):
+    if not filters:
+        return binary
+
     filters_applied = []
-    for fname in farr:
+    for fname, fparams in filters_with_params(filters, params):
         try:
-            binary = apply_filter(fname, binary, params)
+            binary = apply_filter(fname, binary, fparams, max_length)
             filters_applied.append(fname)
         except NotImplementedError:
             log.exception("Partially decoded. Filters applied: {}".format(filters_applied))
@@ -62,6 +83,43 @@ def apply_filter_multi(filters, binary, params):
     return binary
 
 
+def iter_apply_filter_multi(filters, chunks, params, chunk_size=STREAM_CHUNK_SIZE):
+    """ Chains filters decoding data coming in chunks
+
+    :raises NotImplementedError: before any data is decoded if some filter is not supported
+    """
+    for fname, fparams in filters_with_params(filters, params):
+        chunks = iter_apply_filter(fname, chunks, fparams, chunk_size)
+    return chunks
+
+
+class StreamPayload(object):
+    """ Stream data left in the source file. Read on demand.
+
+    >>> from pdfreader.buffer import Buffer
+    >>> p = StreamPayload(Buffer(b'stream\\n***data***\\nendstream', 0), 7, 10)
+    >>> len(p), p.read()
+    (10, b'***data***')
+    """
+
+    def __init__(self, buffer, offset, length):
+        self.buffer = buffer
+        self.offset = offset
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def read(self, n=None):
+        """ :return: bytes, the whole data or first n bytes """
+        return self.buffer.read_at(self.offset, self.length if n is None else min(n, self.length))
+
+    def iter_read(self, chunk_size):
+        """ Yields data in chunks """
+        for i in range(0, self.length, chunk_size):
+            yield self.buffer.read_at(self.offset + i, min(chunk_size, self.length - i))
+
+
 class Stream(object):
     """ binary stream: dictionary and binary data
         common keys:
@@ -70,12 +128,17 @@ class Stream(object):
         DecodeParms - dict or array
         F - file specification
 
+        Binary data may be given as :class:`StreamPayload`. Then it's read from the file on the first access.
+
     """
 
+    #: Limit of decoded data size, bytes. Data beyond the limit is dropped with a warning. Unlimited if None.
+    max_decoded_size = None
+
     def __init__(self, info_dict, binary_stream):
         if not isinstance(info_dict, Dictionary):
             raise AssertionError
-        if not isinstance(binary_stream, bytes):
+        if not isinstance(binary_stream, (bytes, StreamPayload)):
             raise AssertionError
 
         if "Length" not in info_dict:
@@ -86,7 +149,18 @@ class Stream(object):
                       .format(info_dict["Length"], len(binary_stream)))
 
         self.dictionary = info_dict
-        self.stream = binary_stream
+        self._stream = binary_stream
+
+    @property
+    def stream(self):
+        """ bytes, raw stream data """
+        if isinstance(self._stream, StreamPayload):
+            self._stream = self._stream.read()
+        return self._stream
+
+    @stream.setter
+    def stream(self, value):
+        self._stream = value
 
     def __getitem__(self, item):
         return self.dictionary.__getitem__(item)
@@ -95,12 +169,14 @@ class Stream(object):
         return self.dictionary.get(item, default)
 
     def __len__(self):
-        return len(self.stream)
+        # doesn't read payload
+        return len(self._stream)
 
     def __repr__(self):
-        data = self.stream
-        if len(data) > 25:
-            data = (self.stream[:25] + b' ...')
+        # payload in file is not read entirely
+        data = self._stream.read(25) if isinstance(self._stream, StreamPayload) else self._stream[:25]
+        if len(self._stream) > 25:
+            data += b' ...'
         return "<Stream:len={},data={}>".format(self.dictionary["Length"], repr(data))
 
     def type(self):
@@ -111,7 +187,44 @@ class Stream(object):
         """ :return: bytes, decoded image stream as it defined by image properties """
         return apply_filter_multi(self.get('Filter'),
                                   self.stream,
-                                  self.dictionary.get("DecodeParms"))
+                                  self.dictionary.get("DecodeParms"),
+                                  self.max_decoded_size)
+
+    def filtered_prefix(self, n):
+        """ Decodes first n bytes of data only. Handy to check data headers or magic bytes of big streams.
+
+        >>> from zlib import compress
+        >>> data = compress(b'%!PS-Adobe-3.0 Resource-CMap' + bytes(10**7))
+        >>> s = Stream({'Length': len(data), 'Filter': Name('FlateDecode')}, data)
+        >>> s.filtered_prefix(14)
+        b'%!PS-Adobe-3.0'
+        """
+        if 'filtered' in self.__dict__:
+            return self.filtered[:n]
+        data, _ = read_limited(self.iter_filtered(min(max(n, 1024), STREAM_CHUNK_SIZE)), n)
+        return data
+
+    def iter_filtered(self, chunk_size=STREAM_CHUNK_SIZE):
+        """ Decodes stream data chunk by chunk. Memory use doesn't depend on the stream size,
+            so big streams can be processed or saved to disk piece by piece.
+
+            :param chunk_size: size of raw data chunks read at once. Decoded chunks are about of the same size.
+            :return: iterator of decoded data chunks
+
+        >>> from zlib import compress
+        >>> from base64 import a85encode
+        >>> data = a85encode(compress(b'sample data' * 1000)) + b'~>'
+        >>> s = Stream({'Length': len(data), 'Filter': [Name('A85'), Name('FlateDecode')]}, data)
+        >>> chunks = list(s.iter_filtered(1024))
+        >>> len(chunks) > 1, b''.join(chunks) == s.filtered
+        (True, True)
+        """
+        data = self._stream
+        if isinstance(data, StreamPayload):
+            chunks = data.iter_read(chunk_size)
+        else:
+            chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        return iter_apply_filter_multi(self.get('Filter'), chunks, self.get("DecodeParms"), chunk_size)
 
 
     def __eq__(self, other):
@@ -119,7 +232,9 @@ class Stream(object):
 
     @classmethod
     def from_stream(cls, other):
-        return cls(other.dictionary, other.stream)
+        res = cls(other.dictionary, other._stream)
+        res.max_decoded_size = other.max_decoded_size
+        return res
 
     def __getattr__(self, item):
         return self.dictionary.get(item)
@@ -158,7 +273,7 @@ class IndirectObject(object):
         if not (isinstance(generation, int) and generation >= 0):
             raise AssertionError
         if not isinstance(value,
-                          (type(null), Boolean, Integer, Real, Array, Dictionary, String, Name, HexString, Stream,
+                          (type(null), Boolean, Integer, Real, float, Array, Dictionary, String, Name, HexString, Stream,
                            IndirectReference)):
             raise AssertionError
         self.num = number
@@ -41,7 +41,8 @@ class StreamBasedObject(Stream):
         Automatically resolves indirect references on attributes access """
 
     def __init__(self, doc, stream):
-        super(StreamBasedObject, self).__init__(stream.dictionary, stream.stream)
+        super(StreamBasedObject, self).__init__(stream.dictionary, stream._stream)
+        self.max_decoded_size = stream.max_decoded_size
         self.doc = doc
         self._cache = {}
 
@@ -171,7 +172,11 @@ class PageTreeNode(DictBasedObject):
         """
         if node is None:
             node = self
-        for child in node.Kids:
+        kids = Dictionary.get(node, 'Kids')
+        # build kids one by one and don't cache them on the node: pages aren't held after they have been used
+        kids = kids if isinstance(kids, Array) else node.Kids
+        for child in kids:
+            child = self.doc.build(child)
             if isinstance(child, Page):
                 yield child
             else:
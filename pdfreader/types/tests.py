@@ -1,12 +1,14 @@
 import unittest
 import doctest
 
-from . import cmap
+from . import cmap, native, xref
 
 
 def suite():
     suite = unittest.TestSuite()
     suite.addTests(doctest.DocTestSuite(cmap))
+    suite.addTests(doctest.DocTestSuite(native))
+    suite.addTests(doctest.DocTestSuite(xref))
     return suite
 
 
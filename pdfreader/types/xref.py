@@ -1,8 +1,15 @@
 import logging
 log = logging.getLogger(__name__)
 
+import sys
+from array import array
 from collections import OrderedDict
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 MAX_GEN = 65535
 
 TYPE_FREE = 0
@@ -10,6 +17,9 @@ TYPE_IN_USE = 1
 TYPE_COMPRESSED = 2
 KNOWN_TYPES = (TYPE_COMPRESSED, TYPE_IN_USE, TYPE_FREE)
 
+#: translate() table marking unknown types as absent (255)
+KNOWN_TYPES_TABLE = bytes(t if t in KNOWN_TYPES else 255 for t in range(256))
+
 
 class BaseXrefEntry(object):
 
@@ -74,15 +84,157 @@ class CompressedObjEntry(BaseXrefEntry):
             .format(s=self)
 
 
+def make_entry(number, typ, col2, col3):
+    """ Builds an entry of the given type from xref stream table columns values """
+    if typ == TYPE_COMPRESSED:
+        return CompressedObjEntry(number=col2, index=col3)
+    return XRefEntry(offset=col2, number=number, generation=col3, typ=typ)
+
+
+def unpack_column(data, n_rows, row_size, offset, width):
+    """ Unpacks a column of big-endian unsigned integers from a binary table in one pass.
+
+        :return: array of n_rows values
+
+        >>> data = bytes([1, 0, 0, 10, 7,  2, 1, 0, 0, 9])
+        >>> [list(unpack_column(data, 2, 5, offset, width)) for offset, width in ((0, 1), (1, 3), (4, 1))]
+        [[1, 2], [10, 65536], [7, 9]]
+    """
+    stop = n_rows * row_size
+    if width == 1:
+        return array('B', data[offset:stop:row_size])
+    if width > 8:
+        return [int.from_bytes(data[i:i + width], "big") for i in range(offset, stop, row_size)]
+
+    if numpy is not None:
+        rows = numpy.frombuffer(data, dtype=numpy.uint8, count=stop).reshape(n_rows, row_size)
+        column = numpy.zeros(n_rows, dtype='>u8')
+        column.view(numpy.uint8).reshape(n_rows, 8)[:, 8 - width:] = rows[:, offset:offset + width]
+        return array('Q', column.astype(numpy.uint64).tobytes())
+
+    # put column bytes into zero-padded big-endian 4 or 8 bytes cells
+    typecode = 'I' if width <= 4 and array('I').itemsize == 4 else 'Q'
+    size = array(typecode).itemsize
+    padded = bytearray(n_rows * size)
+    for k in range(width):
+        padded[size - width + k::size] = data[offset + k:stop:row_size]
+    column = array(typecode, padded)
+    if sys.byteorder == 'little':
+        column.byteswap()
+    return column
+
+
+class XRefEntries(object):
+    """ Dict-like collection of xref entries of the same type: number -> entry.
+
+        Xref subsections are kept in compact arrays, entries are built on access.
+        Later subsections override earlier ones like dict updates do.
+
+        >>> entries = XRefEntries(TYPE_IN_USE)
+        >>> entries.add_subsection(10, bytes([1, 0, 1]), array('q', [100, 0, 300]), array('H', [0, 0, 2]))
+        >>> entries.get(12)
+        <XRefEntry:number=12,generation=2,offset=300,type=1>
+        >>> entries.get(11) is None, 9 in entries, len(entries), list(entries)
+        (True, False, 2, [10, 12])
+        >>> entries.add_subsection(11, bytes([1]), array('q', [200]), array('H', [0]))
+        >>> entries[11]
+        <XRefEntry:number=11,generation=0,offset=200,type=1>
+
+        >>> entries = XRefEntries(TYPE_COMPRESSED)
+        >>> entries.add_subsection(5, bytes([2]), array('q', [3]), array('H', [7]))
+        >>> entries[5]
+        <XRefEntry(compressed):number=3,generation=0,index=7,type=2>
+    """
+
+    def __init__(self, typ):
+        self.type = typ
+        # (first object number, types bytes, 2nd column array, 3rd column array)
+        self.subsections = []
+        # entries added one by one
+        self.entries = OrderedDict()
+
+    def add_subsection(self, first, types, col2, col3):
+        """ Adds subsection as columns of xref stream table.
+
+            :param types: bytes of entry types: TYPE_FREE, TYPE_IN_USE, TYPE_COMPRESSED
+            :param col2: offsets for in-use entries, object stream numbers for compressed ones
+            :param col3: generations for in-use entries, indexes within object stream for compressed ones
+        """
+        self.subsections.append((first, types, col2, col3))
+
+    def __setitem__(self, number, entry):
+        self.entries[number] = entry
+
+    def get(self, number, default=None):
+        entry = self.entries.get(number)
+        if entry is not None:
+            return entry
+        for first, types, col2, col3 in reversed(self.subsections):
+            i = number - first
+            if 0 <= i < len(types) and types[i] == self.type:
+                return make_entry(number, self.type, col2[i], col3[i])
+        return default
+
+    def __getitem__(self, number):
+        entry = self.get(number)
+        if entry is None:
+            raise KeyError(number)
+        return entry
+
+    def __contains__(self, number):
+        return self.get(number) is not None
+
+    def __iter__(self):
+        if not self.subsections:
+            yield from self.entries
+            return
+        seen = set()
+        for number in self.entries:
+            seen.add(number)
+            yield number
+        for first, types, _, _ in self.subsections:
+            for i, typ in enumerate(types):
+                if typ == self.type and first + i not in seen:
+                    seen.add(first + i)
+                    yield first + i
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self[n] for n in self)
+
+    def items(self):
+        return ((n, self[n]) for n in self)
+
+
+#: direct xref n/f flags to entry types
+FLAG_TYPES = bytes.maketrans(b'nf', bytes([TYPE_IN_USE, TYPE_FREE]))
+
+
 class XRef(object):
     """ xref - Cross reference entry """
 
     def __init__(self):
         # According to the specification free objexts must be implemented as a linked list
         # But we don't care about that as we don't want to update PDFs. Just read.
-        self.free = OrderedDict()
-        self.in_use = OrderedDict()
-        self.compressed = OrderedDict()
+        self.free = XRefEntries(TYPE_FREE)
+        self.in_use = XRefEntries(TYPE_IN_USE)
+        self.compressed = XRefEntries(TYPE_COMPRESSED)
+
+    def add_subsection(self, first, types, col2, col3):
+        """ Adds subsection of entries of all types. See :meth:`XRefEntries.add_subsection` """
+        for entries in (self.free, self.in_use, self.compressed):
+            entries.add_subsection(first, types, col2, col3)
+
+    def add_direct_subsection(self, first, offsets, generations, flags):
+        """ Adds direct xref subsection: arrays of offsets and generations, and bytes of n/f flags """
+        types = flags.translate(FLAG_TYPES)
+        self.in_use.add_subsection(first, types, offsets, generations)
+        self.free.add_subsection(first, types, offsets, generations)
 
     @property
     def __len__(self):
@@ -111,55 +263,127 @@ class XRef(object):
 
     @classmethod
     def from_stream(cls, stream):
+        """ Decodes xref stream table column by column. All /Index subsections are supported.
+
+        >>> from pdfreader.types.native import Stream
+        >>> data = bytes([0, 0, 0, 255,  1, 0, 15, 0,  3, 0, 40, 0,  2, 0, 7, 1])
+        >>> xref = XRef.from_stream(Stream({'Type': 'XRef', 'W': [1, 2, 1], 'Size': 4, 'Length': len(data)}, data))
+        >>> index = XRefIndex([xref])
+        >>> index.get(1), index.get(2), index.get(3)
+        (<XRefEntry:number=1,generation=0,offset=15,type=1>, None, <XRefEntry(compressed):number=7,generation=0,index=1,type=2>)
+        """
         self = cls()
-        self.compressed = {}
         self._stream = stream # Just for debugging, normally we don't need this.
 
-        if stream.get("Index"):
-            # ToDo: data/f8ben.pdf contains index of [226, 1, 250, 1, 299, 2, 302, 3]
-            # ToDo: and the only meaningfull in_use entry. PDF 1.7 says here must be just 2 values.
-            # ToDo: this must be interpreded some way. Need to investigate
-            first_object, n_entries = stream["Index"][0:2]
-        else:
-            first_object, n_entries = 0, stream["Size"]
+        index = stream.get("Index") or [0, stream["Size"]]
         colsizes = stream["W"]
-        colsoffsets = [0, colsizes[0], colsizes[0] + colsizes[1]]
         rowsize = sum(colsizes)
         data = stream.filtered
+        n_rows = len(data) // rowsize
+
+        colsoffsets = [0, colsizes[0], colsizes[0] + colsizes[1]]
+        # type defaults to 1 (in use) when absent, other columns to 0
+        defaults = [TYPE_IN_USE, 0, 0]
+        cols = [unpack_column(data, n_rows, rowsize, colsoffsets[j], colsizes[j]) if colsizes[j]
+                else array('B', [defaults[j]]) * n_rows
+                for j in range(3)]
+        types = cols[0]
+        # PDF 1.5-1.7 defines any other reference types as references to null objects, so we skip those
+        if not isinstance(types, array) or types.typecode != 'B':
+            types = array('B', [t if t in KNOWN_TYPES else 255 for t in types])
+        types = types.tobytes().translate(KNOWN_TYPES_TABLE)
 
-        # walk rows
-        objnum = first_object
-        for i in range(0, len(data), rowsize):
-            row = data[i:i+rowsize]
-            cols, entry = [], None
-            # extract columns
-            for j in range(3):
-                if colsizes[j] == 0:
-                    # if colsize is 0 it means it's just absent
-                    # 0 - default
-                    v = 0
-                else:
-                    b = colsoffsets[j]
-                    e = b + colsizes[j]
-                    v = int.from_bytes(row[b:e], "big")
-                cols.append(v)
-
-            if cols[0] == 0:
-                # free entry
-                entry = XRefEntry(number=cols[1], generation=cols[2], offset=0, typ=TYPE_FREE)
-            elif cols[0] == 1:
-                # used entry
-                entry = XRefEntry(number=objnum, generation=cols[2], offset=cols[1], typ=TYPE_IN_USE)
-            elif cols[0] == 2:
-                # compressed object
-                entry = CompressedObjEntry(number=cols[1], index=cols[2])
-            else:
-                # PDF 1.5-1.7 defines any other reference types as references to null objects.
-                # so we just skip those
-                log.debug("Undefined xref col type (index 0): {}".format(cols))
-
-            if entry is not None:
-                self.add_entry(entry)
-            objnum += 1
+        row = 0
+        pairs = [index[k:k + 2] for k in range(0, len(index) - 1, 2)]
+        for k, (first_object, n_entries) in enumerate(pairs):
+            if k == len(pairs) - 1:
+                # the rest of rows belongs to the last subsection
+                n_entries = max(n_entries, n_rows - row)
+            end = min(row + n_entries, n_rows)
+            self.add_subsection(first_object, types[row:end], cols[1][row:end], cols[2][row:end])
+            row = end
 
         return self
+
+
+class XRefIndex(object):
+    """ Merged index of all xref sections: object number -> the newest entry.
+        Lookups don't depend on number of incremental updates.
+
+        :param xrefs: xref sections, the newest first as they are chained by /Prev
+
+        >>> old, new = XRef(), XRef()
+        >>> old.add_direct_subsection(0, array('q', [0, 10, 20]), array('H', [65535, 0, 0]), b'fnn')
+        >>> new.add_direct_subsection(2, array('q', [30]), array('H', [1]), b'n')
+        >>> index = XRefIndex([new, old])
+        >>> index.get(1), index.get(2), index.get(3)
+        (<XRefEntry:number=1,generation=0,offset=10,type=1>, <XRefEntry:number=2,generation=1,offset=30,type=1>, None)
+    """
+
+    #: marks absent entries
+    ABSENT = 255
+
+    def __init__(self, xrefs):
+        subsections = [s for xref in xrefs for s in xref.in_use.subsections]
+        n_entries = sum(len(types) for _, types, _, _ in subsections)
+        end = max([first + len(types) for first, types, _, _ in subsections] or [0])
+        # don't let a bogus object number allocate huge arrays: such entries go to the dict
+        size = min(end, 4 * n_entries + 4096)
+        self.types = bytearray([self.ABSENT]) * size
+        self.col2 = array('Q', bytes(8 * size))
+        self.col3 = array('Q', bytes(8 * size))
+        self.sparse = {}
+
+        # the oldest first, so newer entries override
+        for xref in reversed(xrefs):
+            for first, types, col2, col3 in xref.in_use.subsections:
+                n = min(len(types), max(size - first, 0))
+                try:
+                    self.col2[first:first + n] = array('Q', col2[:n])
+                    self.col3[first:first + n] = array('Q', col3[:n])
+                    self.types[first:first + n] = types[:n]
+                except OverflowError:
+                    n = 0
+                for i in range(n, len(types)):
+                    self.set(first + i, types[i], col2[i], col3[i])
+            # entries added one by one
+            for entries in (xref.free, xref.in_use, xref.compressed):
+                for number, entry in entries.entries.items():
+                    if entry.is_compressed:
+                        self.set(number, entry.type, entry.number, entry.index)
+                    else:
+                        self.set(number, entry.type, entry.offset, entry.generation)
+
+    def set(self, number, typ, col2, col3):
+        if 0 <= number < len(self.types):
+            try:
+                self.col2[number], self.col3[number] = col2, col3
+                self.types[number] = typ
+                self.sparse.pop(number, None)
+                return
+            except OverflowError:
+                self.types[number] = self.ABSENT
+        self.sparse[number] = (typ, col2, col3)
+
+    @classmethod
+    def from_columns(cls, types, col2, col3, sparse):
+        """ Restores an index from its columns, e.g. loaded from a saved document index
+
+        >>> index = XRefIndex.from_columns(b'\\xff\\x01\\x02', array('Q', [0, 10, 5]), array('Q', [0, 0, 1]),
+        ...                                {7: (1, 70, 0)})
+        >>> index.get(0), index.get(1), index.get(7)
+        (None, <XRefEntry:number=1,generation=0,offset=10,type=1>, <XRefEntry:number=7,generation=0,offset=70,type=1>)
+        >>> index.get(2)
+        <XRefEntry(compressed):number=5,generation=0,index=1,type=2>
+        """
+        index = cls([])
+        index.types, index.col2, index.col3 = bytearray(types), col2, col3
+        index.sparse = dict(sparse)
+        return index
+
+    def get(self, number):
+        """ :return: the newest entry of any type or None if the object is not listed """
+        if 0 <= number < len(self.types) and self.types[number] != self.ABSENT:
+            return make_entry(number, self.types[number], self.col2[number], self.col3[number])
+        if number in self.sparse:
+            return make_entry(number, *self.sparse[number])
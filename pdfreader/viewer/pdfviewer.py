@@ -1,6 +1,7 @@
 import logging
 log = logging.getLogger(__name__)
 
+from decimal import Decimal
 from itertools import islice
 
 from ..document import PDFDocument
@@ -69,7 +70,8 @@ class ContextualViewer(object):
 
     operators_aliases = {}
 
-    def __init__(self, stream, resources, gss):
+    def __init__(self, stream, resources, gss, real_type=Decimal):
+        self.real_type = real_type
         self.canvas = self.canvas_class()
         self.gss = gss
         self.resources = resources
@@ -115,7 +117,7 @@ class ContextualViewer(object):
         """ Renders current page onto current canvas by interpreting content stream(s) commands.
             Charnges: graphical state, canvas.
         """
-        parser = self.parser_class(self.stream)
+        parser = self.parser_class(self.stream, real_type=self.real_type)
         for obj in parser.objects():
             self.notify(obj)
 
@@ -213,12 +215,12 @@ class PDFViewer(ContextualViewer):
 
     operators_aliases = {}
 
-    def __init__(self, fobj, password=''):
+    def __init__(self, fobj, password='', real_type=Decimal):
         """ Constructor method """
         self._pages = {}  # pages cache
         self.current_page_number = None
-        self.doc = PDFDocument(fobj, password=password)
-        super(PDFViewer, self).__init__(None, Resources(), self.graphics_state_stack_class())
+        self.doc = PDFDocument(fobj, password=password, real_type=real_type)
+        super(PDFViewer, self).__init__(None, Resources(), self.graphics_state_stack_class(), real_type=real_type)
 
     @property
     def metadata(self):
@@ -26,7 +26,7 @@ def object_to_string(obj):
         val = "/" + obj
     elif isinstance(obj, str):
         val = obj
-    elif isinstance(obj, (int, Integer, Decimal)):
+    elif isinstance(obj, (int, Integer, Decimal, float)):
         val = str(obj)
     elif isinstance(obj, Array):
         val = "[" + " ".join([object_to_string(elm) for elm in obj]) + "]"
@@ -174,8 +174,9 @@ class SimplePDFViewer(TextOperatorsMixin, PDFViewer):
 
         On initialization automatically navigates to the 1st page.
 
-        :param fobj: file-like object: binary file descriptor, BytesIO stream etc.
+        :param fobj: file-like object: binary file descriptor, BytesIO stream etc. or a file path.
         :param password: Optional. Password to access PDF content.
+        :param real_type: Optional. Type of real numbers: :class:`~decimal.Decimal` (default) or float.
 
     """
 
@@ -199,7 +200,7 @@ class SimplePDFViewer(TextOperatorsMixin, PDFViewer):
         return self
 
     def __exit__(self, type, value, traceback):
-        return
+        self.doc.close()
 
     def render(self):
         if self.current_page_number not in self._canvas_cache:
@@ -225,7 +226,7 @@ class SimplePDFViewer(TextOperatorsMixin, PDFViewer):
                 # render form and save
                 rs = [xobj.Resources] if xobj.Resources else []
                 resources = Resources.from_page(self.current_page, resources_stack=rs)
-                subviewer = FormViewer(xobj.filtered, resources, self.gss)
+                subviewer = FormViewer(xobj.filtered, resources, self.gss, real_type=self.real_type)
                 subviewer.render()
                 self.canvas.forms[name] = subviewer.canvas
 
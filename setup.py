@@ -136,8 +136,7 @@ setup(name="pdfreader",
       package_data={'doc': ['doc/*'],
                     'pdfreader.codecs': ['cmaps/*']},
       zip_safe=False,
-      install_requires=['bitarray>=2.9.2',
-                        'pillow>=7.1.0',
+      install_requires=['pillow>=7.1.0',
                         'pycryptodome>=3.19.1',
                         'python-dateutil>=2.8.1',
                         'setuptools>=68.2.0'],